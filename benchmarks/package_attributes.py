@@ -0,0 +1,151 @@
+"""
+Measure the time taken to validate the package attributes read by the solver.
+
+A synthetic package repository is written to a temp dir, containing
+`--families` x `--versions` packages. Each package has requirements, two
+variants, and the other attributes typical of a released package (tools,
+help, authors, commands etc).
+
+Package files are loaded before timing starts, so that only attribute
+validation is measured. The solver attributes (version, requires, variants,
+timestamp) of every variant are read twice, once with validation of the
+solver attributes done entirely by the package schema, and once with their
+fast path enabled. For comparison, the time taken to validate all attributes
+of every package is also reported.
+
+Example:
+
+    ]$ python benchmarks/package_attributes.py --families 500 --versions 20
+"""
+import os.path
+import sys
+
+src_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, os.path.realpath(src_dir))
+
+from rez.vendor import argparse
+from rez.packages_ import iter_package_families
+from rez.package_repository import package_repository_manager
+from rez import package_resources_
+import tempfile
+import shutil
+import time
+
+
+package_template = '''\
+name = %(name)r
+version = %(version)r
+description = "A synthetic package, used to measure package attributes."
+authors = ["joe.bloggs", "jane.doe"]
+uuid = "8c4d8a2e8e0b4e0c9a0e9b3c6b2f7c1d"
+tools = ["%(name)s", "%(name)s_admin", "%(name)s_debug"]
+help = [["Home", "http://example.com/%(name)s"],
+        ["API", "http://example.com/%(name)s/api"]]
+requires = %(requires)r
+variants = [["platform-linux", "python-2.7"], ["platform-linux", "python-3.6"]]
+timestamp = 1500000000
+
+def commands():
+    env.PATH.append("{root}/bin")
+    env.PYTHONPATH.append("{root}/python")
+'''
+
+
+def write_packages(path, num_families, num_versions):
+    for i in range(num_families):
+        name = "fam%d" % i
+        for j in range(num_versions):
+            version = "1.%d.0" % j
+            requires = ["fam%d-1.%d+" % ((i + k) % num_families, k)
+                        for k in range(1, 4)]
+
+            pkg_path = os.path.join(path, name, version)
+            os.makedirs(pkg_path)
+            with open(os.path.join(pkg_path, "package.py"), 'w') as f:
+                f.write(package_template % dict(name=name,
+                                                version=version,
+                                                requires=requires))
+
+
+def load_packages(packages_path):
+    package_repository_manager.clear_caches()
+    packages = []
+
+    for family in iter_package_families(paths=[packages_path]):
+        for package in family.iter_packages():
+            package.data  # load the package file
+            packages.append(package)
+
+    return packages
+
+
+def read_solver_attributes(packages):
+    t = time.time()
+    for package in packages:
+        package.timestamp
+        for variant in package.iter_variants():
+            variant.version
+            variant.get_requires(build_requires=True)
+    return time.time() - t
+
+
+def read_all_attributes(packages):
+    t = time.time()
+    for package in packages:
+        package.validate_data()
+    return time.time() - t
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument("--families", type=int, default=500,
+                        help="number of package families (default: %(default)s)")
+    parser.add_argument("--versions", type=int, default=20,
+                        help="versions per family (default: %(default)s)")
+    opts = parser.parse_args()
+
+    path = tempfile.mkdtemp(prefix="rez_benchmark_")
+    converters = package_resources_.package_pod_converters.copy()
+
+    try:
+        write_packages(path, opts.families, opts.versions)
+
+        package_resources_.package_pod_converters.clear()
+        try:
+            packages = load_packages(path)
+            schema_secs = read_solver_attributes(packages)
+        finally:
+            package_resources_.package_pod_converters.update(converters)
+
+        packages = load_packages(path)
+        fast_secs = read_solver_attributes(packages)
+
+        packages = load_packages(path)
+        all_secs = read_all_attributes(packages)
+    finally:
+        shutil.rmtree(path)
+
+    print "packages:                     %d" % len(packages)
+    print "solver attributes (schema):   %.02f secs" % schema_secs
+    print "solver attributes (fast):     %.02f secs" % fast_secs
+    print "all attributes:               %.02f secs" % all_secs
+
+
+if __name__ == "__main__":
+    main()
+
+
+# Copyright 2013-2016 Allan Johns.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
@@ -0,0 +1,166 @@
+"""
+Measure the memory retained by the solver's phase stack.
+
+A synthetic package repository is written to a temp dir, containing a set of
+'filler' packages, and a set of 'choice' packages whose versions have no
+common dependency. Every choice package causes a split, so the phase stack
+ends up holding one pending phase per choice package.
+
+After each solve step, the bytes retained by the phases on the stack are
+counted (objects shared between phases are only counted once), and the peak
+is reported.
+
+Example:
+
+    ]$ python benchmarks/solver_memory.py --fillers 200 --choices 50
+"""
+import os.path
+import sys
+
+src_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, os.path.realpath(src_dir))
+
+from rez.vendor import argparse
+from rez.vendor.version.requirement import Requirement
+from rez.solver import Solver, SolverStatus
+import resource
+import tempfile
+import shutil
+import time
+
+
+def write_packages(path, num_fillers, num_choices, num_versions):
+    """Write the synthetic package repository.
+
+    Returns:
+        List of str: The request to resolve.
+    """
+    def _write(name, version, requires):
+        pkg_path = os.path.join(path, name, version)
+        os.makedirs(pkg_path)
+        with open(os.path.join(pkg_path, "package.py"), 'w') as f:
+            f.write("name = %r\nversion = %r\nrequires = %r\n"
+                    % (name, version, requires))
+
+    fillers = ["filler%d" % i for i in range(num_fillers)]
+    for name in fillers:
+        _write(name, "1", [])
+
+    choices = ["choice%d" % i for i in range(num_choices)]
+    for i, name in enumerate(choices):
+        for j in range(num_versions):
+            requires = [fillers[(i + j) % num_fillers]] if num_fillers else []
+            _write(name, str(j + 1), requires)
+
+    return fillers + choices
+
+
+def retained_size(phases):
+    """Get the number of bytes retained by a list of phases.
+
+    Solver objects (phases, scopes, slices, entries) and the containers they
+    hold are counted, each only once. Packages and variants are not counted,
+    since they are owned by the package cache rather than the phases.
+    """
+    seen = set()
+    stack = list(phases)
+    total = 0
+
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+
+        if isinstance(obj, (list, tuple, set, frozenset)):
+            items = list(obj)
+        elif isinstance(obj, dict):
+            items = obj.keys() + obj.values()
+        elif getattr(obj.__class__, "__module__", None) == "rez.solver":
+            attrs = {}
+            if hasattr(obj, "__dict__"):
+                total += sys.getsizeof(obj.__dict__)
+                attrs.update(obj.__dict__)
+            for cls in obj.__class__.__mro__:
+                for name in cls.__dict__.get("__slots__", ()):
+                    if hasattr(obj, name):
+                        attrs[name] = getattr(obj, name)
+
+            items = [v for k, v in attrs.iteritems()
+                     if k not in ("solver", "pr")]
+        else:
+            continue
+
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(items)
+
+    return total
+
+
+def run(request, packages_path):
+    reqs = [Requirement(x) for x in request]
+    solver = Solver(reqs, [packages_path])
+    peak_depth = 0
+    peak_size = 0
+
+    secs = 0.0
+
+    while solver.status == SolverStatus.unsolved:
+        t1 = time.time()
+        solver.solve_step()
+        secs += time.time() - t1
+
+        depth = len(solver.phase_stack)
+        if depth >= peak_depth:
+            peak_depth = depth
+            peak_size = max(peak_size, retained_size(solver.phase_stack))
+
+    return solver, peak_depth, peak_size, secs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument("--fillers", type=int, default=200,
+                        help="number of filler packages (default: %(default)s)")
+    parser.add_argument("--choices", type=int, default=50,
+                        help="number of choice packages (default: %(default)s)")
+    parser.add_argument("--versions", type=int, default=4,
+                        help="versions per choice package (default: %(default)s)")
+    opts = parser.parse_args()
+
+    path = tempfile.mkdtemp(prefix="rez_benchmark_")
+    try:
+        request = write_packages(path, opts.fillers, opts.choices,
+                                 opts.versions)
+        solver, depth, size, secs = run(request, path)
+    finally:
+        shutil.rmtree(path)
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print "request size:           %d" % len(request)
+    print "status:                 %s" % solver.status.name
+    print "solve steps:            %d" % solver.num_solves
+    print "peak phase stack depth: %d" % depth
+    print "peak phase stack size:  %.1f KiB" % (size / 1024.0)
+    print "solve time:             %.02f secs" % secs
+    print "process max RSS:        %.1f MiB" % (maxrss / 1024.0)
+
+
+if __name__ == "__main__":
+    main()
+
+
+# Copyright 2013-2016 Allan Johns.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
@@ -0,0 +1,82 @@
+"""
+Measure the time taken to parse version ranges.
+
+The ranges cover each form of the version range syntax (superset, exact,
+inclusive, lower, upper and bounded ranges, with and without commas, and
+unions of these). Each range is parsed `--repeats` times, once with the parse
+cache disabled, and once with it enabled.
+
+Example:
+
+    ]$ python benchmarks/version_range_parse.py --repeats 2000
+"""
+import os.path
+import sys
+
+src_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, os.path.realpath(src_dir))
+
+from rez.vendor import argparse
+from rez.vendor.version import version as version_
+from rez.vendor.version.version import VersionRange
+import time
+
+
+range_strs = [
+    "", "1", "1.0.0", "3+<3_", "_+<__", "1.2+<=2.0", "1.2..2.0", "10+,<20",
+    "10+<20", ">=2", "2+", ">2", "<5", "<=5", ">1<5", ">1<=5", "1+<=5", "==2",
+    ">=3,<=3", "3|1", "5|3|1", "1|1_|1__", "||", "<1|1", ">4<6|1+<3",
+    "4+<6|1+<3|", "2+<=6|3+<5", "3+,<5|2+<=6", "2|<2.1", ">", "+", ">=", "<=",
+    "..", "+<=", "1.2.3-alpha4+<2.0.0-beta", "2015.05.alpha|2016+<2017"]
+
+
+def run(repeats):
+    t = time.time()
+    for _ in xrange(repeats):
+        for range_str in range_strs:
+            VersionRange(range_str)
+    return time.time() - t
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument("--repeats", type=int, default=2000,
+                        help="number of times each range is parsed (default: %(default)s)")
+    opts = parser.parse_args()
+
+    num_parses = opts.repeats * len(range_strs)
+
+    try:
+        version_.set_cache_size(0)
+        uncached = run(opts.repeats)
+        version_.set_cache_size(version_.default_cache_size)
+        cached = run(opts.repeats)
+    finally:
+        version_.set_cache_size(version_.default_cache_size)
+
+    print "distinct ranges:   %d" % len(range_strs)
+    print "parses:            %d" % num_parses
+    print "uncached:          %.02f secs (%.1f usecs/parse)" \
+        % (uncached, uncached * 1e6 / num_parses)
+    print "cached:            %.02f secs (%.1f usecs/parse)" \
+        % (cached, cached * 1e6 / num_parses)
+
+
+if __name__ == "__main__":
+    main()
+
+
+# Copyright 2013-2016 Allan Johns.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
@@ -59,6 +59,7 @@ scripts = [
     "rez-help",
     "rez-depends",
     "rez-memcache",
+    "rez-diskcache",
     "rez-yaml2py",
     "bez",
     "_rez_fwd",  # TODO rename this _rez-forward for consistency
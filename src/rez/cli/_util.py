@@ -25,6 +25,7 @@ subcommands = [
     "status",
     "suite",
     "memcache",
+    "diskcache",
     "selftest",
     "yaml2py",
     "diff",
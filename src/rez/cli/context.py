@@ -56,6 +56,10 @@ def setup_parser(parser, completions=False):
     parser.add_argument(
         "--wg", "--write-graph", dest="write_graph", type=str,
         metavar='FILE', help="write the resolve graph to FILE")
+    parser.add_argument(
+        "--pt", "--print-trace", dest="print_trace", action="store_true",
+        help="print the solver trace as JSON lines. The context must have been "
+        "resolved with the 'solver_trace' config setting enabled")
     parser.add_argument(
         "--pp", "--prune-package", dest="prune_pkg", metavar="PKG",
         type=str, help="prune the graph down to PKG")
@@ -144,6 +148,10 @@ def command(opts, parser, extra_arg_groups=None):
         elif opts.print_graph:
             gstr = _graph()
             print gstr
+        elif opts.print_trace:
+            if not rc.print_solve_trace():
+                print >> sys.stderr, "The context does not contain a solver trace."
+                sys.exit(1)
         elif opts.graph or opts.write_graph:
             gstr = _graph()
             if opts.prune_pkg:
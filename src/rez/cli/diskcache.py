@@ -0,0 +1,83 @@
+"""
+Manage and query the local disk caches.
+"""
+
+
+def setup_parser(parser, completions=False):
+    parser.add_argument(
+        "--clear", action="store_true",
+        help="delete all cache entries")
+    parser.add_argument(
+        "--evict", action="store_true",
+        help="delete least recently used entries, until each cache is within "
+        "its maximum size")
+
+
+def command(opts, parser, extra_arg_groups=None):
+    from rez.serialise import get_package_file_cache
+    from rez.utils.resolve_cache import get_resolve_cache, \
+        FileSystemResolveCache
+    from rez.utils.formatting import columnise, readable_time_duration, \
+        readable_memory_size
+    import time
+    import sys
+
+    caches = []
+
+    cache = get_package_file_cache()
+    if cache:
+        caches.append(("package files", cache))
+
+    cache = get_resolve_cache()
+    if isinstance(cache, FileSystemResolveCache):
+        caches.append(("resolves", cache))
+
+    if not caches:
+        print >> sys.stderr, "disk caching is not enabled."
+        sys.exit(1)
+
+    if opts.clear:
+        for name, cache in caches:
+            cache.clear()
+            print "%s cache at %s is cleared." % (name, cache.path)
+        return
+
+    if opts.evict:
+        for name, cache in caches:
+            if cache.max_size is not None:
+                cache.evict(cache.max_size)
+
+    rows = [["CACHE", "PATH", "ENTRIES", "SIZE", "MAX SIZE", "OLDEST"],
+            ["-----", "----", "-------", "----", "--------", "------"]]
+
+    for name, cache in caches:
+        stats = cache.get_stats()
+        max_size = stats["max_size"]
+        oldest = stats["oldest"]
+
+        row = (name,
+               cache.path,
+               str(stats["entries"]),
+               readable_memory_size(stats["size"]),
+               "-" if max_size is None else readable_memory_size(max_size),
+               "-" if oldest is None else
+               readable_time_duration(int(time.time() - oldest)))
+
+        rows.append(row)
+    print '\n'.join(columnise(rows))
+
+
+# Copyright 2013-2016 Allan Johns.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
@@ -52,9 +52,22 @@ def setup_parser(parser, completions=False):
         metavar='N',
         help="abort if the number of failed configuration attempts exceeds N")
     parser.add_argument(
-        "--time-limit", type=int, default=-1,
+        "--time-limit", type=int, default=None,
         dest="time_limit", metavar='SECS',
-        help="abort if the resolve time exceeds SECS")
+        help="abort if the resolve time exceeds SECS (default: "
+        "config.resolve_time_limit)")
+    parser.add_argument(
+        "--solve-limit", type=int, default=None,
+        dest="solve_limit", metavar='N',
+        help="abort if the number of solve steps exceeds N (default: "
+        "config.resolve_solve_limit)")
+    parser.add_argument(
+        "--memory-limit", type=int, default=None,
+        dest="memory_limit", metavar='MB',
+        help="abort if the resolve grows the peak memory usage (maximum "
+        "resident set size) of the process by more than MB megabytes. Memory "
+        "already used at a previous peak is not counted, so this is not a "
+        "limit on current memory usage (default: config.resolve_memory_limit)")
     parser.add_argument(
         "-o", "--output", type=str, metavar="FILE",
         help="store the context into an rxt file, instead of starting an "
@@ -64,6 +77,17 @@ def setup_parser(parser, completions=False):
         "-i", "--input", type=str, metavar="FILE",
         help="use a previously saved context. Resolve settings, such as PKG, "
         "--ni etc are ignored in this case")
+    batch_action = parser.add_argument(
+        "--batch", type=str, metavar="FILE",
+        help="resolve each request listed in FILE (one per line), and store "
+        "each context into an rxt file, instead of starting a shell. The rxt "
+        "files are written to the directory given by --output (default: the "
+        "current directory)")
+    parser.add_argument(
+        "--batch-workers", type=int, default=1, dest="batch_workers",
+        metavar="N",
+        help="number of processes to spread --batch resolves across "
+        "(default: %(default)s)")
     parser.add_argument(
         "--exclude", type=str, nargs='+', metavar="RULE",
         help="add package exclusion filters, eg '*.beta'. Note that these are "
@@ -111,6 +135,7 @@ def setup_parser(parser, completions=False):
             ExecutablesCompleter, AndCompleter, SequencedCompleter
         command_action.completer = AndCompleter(ExecutablesCompleter, FilesCompleter())
         input_action.completer = FilesCompleter(dirs=False, file_patterns=["*.rxt"])
+        batch_action.completer = FilesCompleter()
         PKG_action.completer = PackageCompleter
         extra_0_action.completer = SequencedCompleter(
             "extra_0", ExecutablesCompleter, FilesCompleter())
@@ -134,6 +159,7 @@ def command(opts, parser, extra_arg_groups=None):
         command = extra_arg_groups[0] or None
 
     context = None
+    patch_context = None
     request = opts.PKG
     t = get_epoch_time_from_str(opts.time) if opts.time else None
 
@@ -144,6 +170,10 @@ def command(opts, parser, extra_arg_groups=None):
         pkg_paths = opts.paths.split(os.pathsep)
         pkg_paths = [os.path.expanduser(x) for x in pkg_paths if x]
 
+    if opts.batch:
+        if opts.PKG or opts.input or opts.patch:
+            parser.error("Cannot use --batch with PKG(s), --input or --patch")
+
     if opts.input:
         if opts.PKG:
             parser.error("Cannot use --input and provide PKG(s) at the same time")
@@ -162,9 +192,7 @@ def command(opts, parser, extra_arg_groups=None):
                 print >> sys.stderr, "cannot patch: not in a context"
                 sys.exit(1)
 
-        request = context.get_patched_request(request,
-                                              strict=opts.strict,
-                                              rank=opts.patch_rank)
+        patch_context = context
         context = None
 
     if context is None:
@@ -182,17 +210,30 @@ def command(opts, parser, extra_arg_groups=None):
             rule = Rule.parse_rule(rule_str)
             package_filter.add_inclusion(rule)
 
+        context_kwargs = dict(timestamp=t,
+                              package_paths=pkg_paths,
+                              building=opts.build,
+                              package_filter=package_filter,
+                              add_implicit_packages=(not opts.no_implicit),
+                              verbosity=opts.verbose,
+                              max_fails=opts.max_fails,
+                              time_limit=opts.time_limit,
+                              solve_limit=opts.solve_limit,
+                              memory_limit=opts.memory_limit,
+                              caching=(not opts.no_cache))
+
+        if opts.batch:
+            _batch_resolve(opts, context_kwargs)
+
         # perform the resolve
-        context = ResolvedContext(package_requests=request,
-                                  timestamp=t,
-                                  package_paths=pkg_paths,
-                                  building=opts.build,
-                                  package_filter=package_filter,
-                                  add_implicit_packages=(not opts.no_implicit),
-                                  verbosity=opts.verbose,
-                                  max_fails=opts.max_fails,
-                                  time_limit=opts.time_limit,
-                                  caching=(not opts.no_cache))
+        if patch_context:
+            context = patch_context.patch(request,
+                                          strict=opts.strict,
+                                          rank=opts.patch_rank,
+                                          **context_kwargs)
+        else:
+            context = ResolvedContext(package_requests=request,
+                                      **context_kwargs)
 
     success = (context.status == ResolverStatus.solved)
     if not success:
@@ -229,6 +270,63 @@ def command(opts, parser, extra_arg_groups=None):
     sys.exit(returncode)
 
 
+def _batch_resolve(opts, context_kwargs):
+    from rez.resolved_context import resolve_contexts
+    from rez.resolver import ResolverStatus
+    from rez.utils.formatting import columnise
+    import time
+    import sys
+    import os
+    import os.path
+
+    requests_list = []
+    with open(opts.batch) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                requests_list.append(line.split())
+
+    dirpath = opts.output or os.getcwd()
+    if not os.path.exists(dirpath):
+        os.makedirs(dirpath)
+
+    t1 = time.time()
+    contexts = resolve_contexts(requests_list,
+                                max_workers=opts.batch_workers,
+                                **context_kwargs)
+    secs = time.time() - t1
+
+    rows = [("#", "request", "status", "load time", "solve time", "cached",
+             "file"),
+            ("-", "-------", "------", "---------", "----------", "------",
+             "----")]
+    nfailed = 0
+    ndigits = len(str(len(contexts)))
+
+    for i, (requests, context) in enumerate(zip(requests_list, contexts)):
+        filepath = os.path.join(dirpath, "%0*d.rxt" % (ndigits, i + 1))
+        context.save(filepath)
+
+        if context.status != ResolverStatus.solved:
+            nfailed += 1
+
+        solve_time = context.solve_time - context.load_time
+        rows.append((str(i + 1),
+                     ' '.join(requests),
+                     context.status.name,
+                     "%.02f" % context.load_time,
+                     "%.02f" % solve_time,
+                     "yes" if context.from_cache else "no",
+                     filepath))
+
+    print '\n'.join(columnise(rows))
+    print
+    print ("%d requests resolved in %.02f secs (%d failed)"
+           % (len(contexts), secs, nfailed))
+
+    sys.exit(1 if nfailed else 0)
+
+
 # Copyright 2013-2016 Allan Johns.
 #
 # This library is free software: you can redistribute it and/or
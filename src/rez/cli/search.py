@@ -74,7 +74,8 @@ def command(opts, parser, extra_arg_groups=None):
     from rez.exceptions import RezError
     from rez.utils.formatting import get_epoch_time_from_str, expand_abbreviations
     from rez.utils.logging_ import print_error
-    from rez.packages_ import iter_package_families, iter_packages
+    from rez.packages_ import iter_package_families, iter_packages, \
+        prefetch_packages
     from rez.vendor.version.requirement import Requirement
     import os.path
     import fnmatch
@@ -164,43 +165,55 @@ def command(opts, parser, extra_arg_groups=None):
 
     # packages/variants
     if type_ in ("package", "variant"):
-        for name in family_names:
-            packages = iter_packages(name, version_range, paths=pkg_paths)
-            if opts.sort or opts.latest:
-                packages = sorted(packages, key=lambda x: x.version)
-                if opts.latest and packages:
-                    packages = [packages[-1]]
-
-            for package in packages:
-                if ((before_time or after_time)
-                    and package.timestamp
-                    and (before_time and package.timestamp >= before_time
-                         or after_time and package.timestamp <= after_time)):
+        # package files are only read if package attributes are needed
+        load_packages = (opts.format or opts.validate or opts.errors
+                         or before_time or after_time or type_ == "variant")
+
+        def _iter_packages():
+            for name in family_names:
+                packages = iter_packages(name, version_range, paths=pkg_paths)
+                if opts.sort or opts.latest:
+                    packages = sorted(packages, key=lambda x: x.version)
+                    if opts.latest and packages:
+                        packages = [packages[-1]]
+
+                for package in packages:
+                    yield package
+
+        packages = _iter_packages()
+        if load_packages:
+            packages = prefetch_packages(packages)
+
+        for package in packages:
+            if ((before_time or after_time)
+                and package.timestamp
+                and (before_time and package.timestamp >= before_time
+                     or after_time and package.timestamp <= after_time)):
+                continue
+
+            if opts.errors:
+                try:
+                    package.validate_data()
+                except error_class as e:
+                    _handle(e)
+                    found = True
+            elif type_ == "package":
+                _print_resource(package)
+                found = True
+            elif type_ == "variant":
+                try:
+                    package.validate_data()
+                except error_class as e:
+                    _handle(e)
                     continue
 
-                if opts.errors:
-                    try:
-                        package.validate_data()
-                    except error_class as e:
-                        _handle(e)
+                try:
+                    for variant in package.iter_variants():
+                        _print_resource(variant)
                         found = True
-                elif type_ == "package":
-                    _print_resource(package)
-                    found = True
-                elif type_ == "variant":
-                    try:
-                        package.validate_data()
-                    except error_class as e:
-                        _handle(e)
-                        continue
-
-                    try:
-                        for variant in package.iter_variants():
-                            _print_resource(variant)
-                            found = True
-                    except error_class as e:
-                        _handle(e)
-                        continue
+                except error_class as e:
+                    _handle(e)
+                    continue
 
     if not found:
         if opts.errors:
@@ -239,6 +239,7 @@ config_schema = Schema({
     "suite_alias_prefix_char":                      Char,
     "tmpdir":                                       OptionalStr,
     "context_tmpdir":                               OptionalStr,
+    "resolve_cache_path":                           OptionalStr,
     "default_shell":                                OptionalStr,
     "terminal_emulator_command":                    OptionalStr,
     "editor":                                       OptionalStr,
@@ -265,11 +266,26 @@ config_schema = Schema({
     "alias_back":                                   OptionalStr,
     "build_thread_count":                           BuildThreadCount_,
     "resource_caching_maxsize":                     Int,
+    "variant_caching_maxsize":                      Int,
+    "version_caching_maxsize":                      Int,
+    "resolve_cache_max_size":                       Int,
+    "resolve_cache_validation_threads":             Int,
+    "resolve_lease_timeout":                        Int,
+    "package_file_cache_path":                      OptionalStr,
+    "package_file_cache_max_size":                  Int,
+    "package_load_threads":                         Int,
     "max_package_changelog_chars":                  Int,
     "memcached_package_file_min_compress_len":      Int,
     "memcached_context_file_min_compress_len":      Int,
     "memcached_listdir_min_compress_len":           Int,
     "memcached_resolve_min_compress_len":           Int,
+    "speculative_solve_workers":                    Int,
+    "solver_prefetch_threads":                      Int,
+    "incremental_patching":                         Bool,
+    "solver_trace":                                 Bool,
+    "resolve_time_limit":                           Int,
+    "resolve_solve_limit":                          Int,
+    "resolve_memory_limit":                         Int,
     "allow_unversioned_packages":                   Bool,
     "rxt_as_yaml":                                  Bool,
     "color_enabled":                                Bool,
@@ -277,6 +293,7 @@ config_schema = Schema({
     "cache_package_files":                          Bool,
     "cache_listdir":                                Bool,
     "prune_failed_graph":                           Bool,
+    "store_resolve_graph":                          Bool,
     "all_parent_variables":                         Bool,
     "all_resetting_variables":                      Bool,
     "package_commands_sourced_first":               Bool,
@@ -84,7 +84,10 @@ class PackageRepository(object):
 
     def clear_caches(self):
         """Clear any cached resources in the pool."""
+        from rez.solver import shared_variant_cache
+
         self.pool.clear_caches()
+        shared_variant_cache.clear(self.uid)
 
     @cached_property
     def uid(self):
@@ -403,9 +406,12 @@ class PackageRepositoryManager(object):
 
     def clear_caches(self):
         """Clear all cached data."""
+        from rez.solver import shared_variant_cache
+
         self.get_repository.cache_clear()
         self._get_repository.cache_clear()
         self.pool.clear_caches()
+        shared_variant_cache.clear()
 
     @lru_cache(maxsize=None)
     def _get_repository(self, path):
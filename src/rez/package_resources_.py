@@ -172,6 +172,49 @@ package_pod_schema_dict.update({
 package_pod_schema = Schema(package_pod_schema_dict)
 
 
+# The solver reads these keys from every package it considers, so validating
+# them against the schema above is a large part of the cost of a resolve. These
+# functions convert values of the usual form directly, and return None for
+# anything else. Values they return None for, or fail to convert, are then
+# validated against the schema as normal (so invalid values give the same
+# errors).
+
+def _requests_from_pod(value):
+    if isinstance(value, list) \
+            and all(isinstance(x, basestring) for x in value):
+        return map(PackageRequest, value)
+    return None
+
+
+def _variants_from_pod(value):
+    if isinstance(value, list):
+        variants = map(_requests_from_pod, value)
+        if None not in variants:
+            return variants
+    return None
+
+
+def _version_from_pod(value):
+    if isinstance(value, basestring):
+        return Version(value)
+    return None
+
+
+def _timestamp_from_pod(value):
+    if isinstance(value, int):
+        return value
+    return None
+
+
+package_pod_converters = {
+    "version":                  _version_from_pod,
+    "requires":                 _requests_from_pod,
+    "build_requires":           _requests_from_pod,
+    "private_build_requires":   _requests_from_pod,
+    "variants":                 _variants_from_pod,
+    "timestamp":                _timestamp_from_pod}
+
+
 #------------------------------------------------------------------------------
 # resource classes
 #------------------------------------------------------------------------------
@@ -327,6 +370,19 @@ class PackageResourceHelper(PackageResource):
                 index=index)
             yield variant
 
+    def _validate_key(self, key, attr, key_schema):
+        if self.schema is package_pod_schema:
+            converter = package_pod_converters.get(key)
+            if converter:
+                try:
+                    value = converter(attr)
+                except Exception:
+                    value = None  # the schema raises the usual error
+                if value is not None:
+                    return value
+
+        return self._validate_key_impl(key, attr, key_schema)
+
     def _convert_to_rex(self, commands):
         if isinstance(commands, list):
             from rez.utils.backcompat import convert_old_commands
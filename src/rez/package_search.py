@@ -10,8 +10,11 @@ that do not provide an implementation.
 from rez.packages_ import iter_package_families, iter_packages, get_latest_package
 from rez.exceptions import PackageFamilyNotFoundError
 from rez.util import ProgressBar
+from rez.utils.threading_ import thread_imap
+from rez.config import config
 from rez.vendor.pygraph.classes.digraph import digraph
 from collections import defaultdict
+from itertools import izip
 from rez.utils.formatting import PackageRequest
 
 
@@ -52,17 +55,24 @@ def get_reverse_dependency_tree(package_name, depth=None, paths=None):
     bar = ProgressBar("Searching", len(package_names))
     lookup = defaultdict(set)
 
-    for i, package_name_ in enumerate(package_names):
-        bar.next()
-        it = iter_packages(name=package_name_, paths=paths)
-        packages = list(it)
+    def _get_requires(package_name_):
+        packages = list(iter_packages(name=package_name_, paths=paths))
         if not packages:
-            continue
+            return None
 
         pkg = max(packages, key=lambda x: x.version)
         requires = set(pkg.requires or [])
         for req_list in (pkg.variants or []):
             requires.update(req_list)
+        return requires
+
+    # families are read on threads, ahead of this loop
+    it = thread_imap(_get_requires, package_names, config.package_load_threads)
+
+    for package_name_, requires in izip(package_names, it):
+        bar.next()
+        if requires is None:
+            continue
 
         for req in requires:
             if not req.conflict:
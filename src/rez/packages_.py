@@ -8,6 +8,7 @@ from rez.utils.formatting import StringFormatMixin, StringFormatType
 from rez.utils.filesystem import is_subdirectory
 from rez.utils.schema import schema_keys
 from rez.utils.resources import ResourceHandle, ResourceWrapper
+from rez.utils.threading_ import thread_imap
 from rez.exceptions import PackageMetadataError, PackageFamilyNotFoundError, \
     ResourceError
 from rez.vendor.version.version import VersionRange
@@ -362,7 +363,7 @@ def iter_package_families(paths=None):
             yield PackageFamily(resource)
 
 
-def iter_packages(name, range_=None, paths=None):
+def iter_packages(name, range_=None, paths=None, load_threads=0):
     """Iterate over `Package` instances, in no particular order.
 
     Packages of the same name and version earlier in the search path take
@@ -375,27 +376,40 @@ def iter_packages(name, range_=None, paths=None):
             to those in `range_`.
         paths (list of str, optional): paths to search for packages, defaults
             to `config.packages_path`.
+        load_threads (int): If 2 or more, load package definition files ahead
+            of the caller on this many threads. See `prefetch_packages`.
 
     Returns:
         `Package` iterator.
     """
-    entries = _get_families(name, paths)
+    it = _iter_packages(name, range_, paths)
+    for package in prefetch_packages(it, load_threads):
+        yield package
 
-    seen = set()
-    for repo, family_resource in entries:
-        for package_resource in repo.iter_packages(family_resource):
-            key = (package_resource.name, package_resource.version)
-            if key in seen:
-                continue
 
-            seen.add(key)
-            if range_:
-                if isinstance(range_, basestring):
-                    range_ = VersionRange(range_)
-                if package_resource.version not in range_:
-                    continue
+def prefetch_packages(packages, max_workers=None):
+    """Iterate over packages, loading their definition files ahead of the
+    caller, on a pool of threads.
+
+    Packages are yielded in the same order as `packages`, once loaded. A
+    package that fails to load is still yielded - the error is raised again
+    when the caller accesses its attributes.
+
+    Args:
+        packages: Iterable of `Package` instances.
+        max_workers (int): Maximum number of threads, defaults to
+            `config.package_load_threads`. If less than 2, packages are not
+            loaded ahead of the caller.
+
+    Returns:
+        `Package` iterator.
+    """
+    if max_workers is None:
+        max_workers = config.package_load_threads
+    if max_workers < 2:
+        return iter(packages)
 
-            yield Package(package_resource)
+    return thread_imap(_load_package, packages, max_workers)
 
 
 def get_package(name, version, paths=None):
@@ -622,15 +636,60 @@ def get_latest_package(name, range_=None, paths=None, error=False):
     Returns:
         `Package` object, or None if no package is found.
     """
-    it = iter_packages(name, range_=range_, paths=paths)
-    try:
-        return max(it, key=lambda x: x.version)
-    except ValueError:  # empty sequence
-        if error:
-            raise PackageFamilyNotFoundError("No such package family %r" % name)
+    if isinstance(range_, basestring):
+        range_ = VersionRange(range_)
+
+    package_resources = _get_sorted_package_resources(name, paths)
+    i = len(package_resources)
+
+    if range_ is not None and package_resources:
+        versions = [x.version for x in package_resources]
+        spans = range_.get_intersecting_spans(versions)
+        i = spans[-1][1] if spans else 0
+
+    if i:
+        return Package(package_resources[i - 1])
+    elif error:
+        raise PackageFamilyNotFoundError("No such package family %r" % name)
+    else:
         return None
 
 
+def _iter_packages(name, range_=None, paths=None):
+    if isinstance(range_, basestring):
+        range_ = VersionRange(range_)
+
+    for package_resource in _iter_package_resources(name, paths):
+        if range_ and package_resource.version not in range_:
+            continue
+        yield Package(package_resource)
+
+
+def _load_package(package):
+    try:
+        package.data
+    except Exception:
+        pass  # raised again when the caller accesses the package
+    return package
+
+
+def _iter_package_resources(name, paths=None):
+    # packages earlier in the searchpath hide packages of the same version
+    # later in the searchpath
+    seen = set()
+    for repo, family_resource in _get_families(name, paths):
+        for package_resource in repo.iter_packages(family_resource):
+            key = (package_resource.name, package_resource.version)
+            if key not in seen:
+                seen.add(key)
+                yield package_resource
+
+
+def _get_sorted_package_resources(name, paths=None):
+    return sorted(_iter_package_resources(name, paths),
+                  key=lambda x: x.version)
+
+
 def _get_families(name, paths=None):
     entries = []
     for path in (paths or config.packages_path):
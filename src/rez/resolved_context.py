@@ -110,7 +110,7 @@ class ResolvedContext(object):
     command within a configured python namespace, without spawning a child
     shell.
     """
-    serialize_version = (4, 2)
+    serialize_version = (4, 4)
     tmpdir_manager = TempDirs(config.context_tmpdir, prefix="rez_context_")
 
     class Callback(object):
@@ -137,8 +137,9 @@ class ResolvedContext(object):
     def __init__(self, package_requests, verbosity=0, timestamp=None,
                  building=False, caching=None, package_paths=None,
                  package_filter=None, package_orderers=None, max_fails=-1,
-                 add_implicit_packages=True, time_limit=-1, callback=None,
-                 package_load_callback=None, buf=None):
+                 add_implicit_packages=True, time_limit=None, callback=None,
+                 package_load_callback=None, buf=None, seed_packages=None,
+                 solve_limit=None, memory_limit=None):
         """Perform a package resolve, and store the result.
 
         Args:
@@ -162,13 +163,25 @@ class ResolvedContext(object):
             max_fails (int): Abort the resolve if the number of failed steps is
                 greater or equal to this number. If -1, does not abort.
             time_limit (int): Abort the resolve if it takes longer than this
-                many seconds. If -1, there is no time limit.
+                many seconds. If -1, there is no time limit. If None, defaults
+                to config.resolve_time_limit.
             callback: See `Solver`.
             package_load_callback: If not None, this callable will be called
                 prior to each package being loaded. It is passed a single
                 `Package` object.
             buf (file-like object): Where to print verbose output to, defaults
                 to stdout.
+            seed_packages (list of `Variant`): Packages to keep at their
+                current version where possible, typically from the resolve of
+                a previous context. See `Resolver`. The locks that the
+                resolve used are kept in `seed_locks`, and saved with the
+                context.
+            solve_limit (int): Abort the resolve after this many solve steps.
+                If -1, there is no limit. If None, defaults to
+                config.resolve_solve_limit.
+            memory_limit (int): Abort the resolve if process memory grows by
+                more than this many megabytes. If -1, there is no limit. If
+                None, defaults to config.resolve_memory_limit.
         """
         self.load_path = None
 
@@ -219,6 +232,9 @@ class ResolvedContext(object):
         self.failure_description = None
         self.graph_string = None
         self.graph_ = None
+        self.graph_func = None  # generates graph_ on demand
+        self.seed_locks = []
+        self.solve_trace = None
         self.from_cache = None
         self.solve_time = 0.0  # inclusive of load time
         self.load_time = 0.0
@@ -227,10 +243,11 @@ class ResolvedContext(object):
         self.parent_suite_path = None
         self.suite_context_name = None
 
-        # perform the solve
+        # perform the solve. Time limit is enforced by the solver itself, so
+        # that the abort reason includes diagnostics
         callback_ = self.Callback(buf=buf,
                                   max_fails=max_fails,
-                                  time_limit=time_limit,
+                                  time_limit=-1,
                                   callback=callback)
 
         request = self.requested_packages(include_implicit=True)
@@ -244,6 +261,10 @@ class ResolvedContext(object):
                             caching=self.caching,
                             callback=callback_,
                             package_load_callback=package_load_callback,
+                            seed_packages=seed_packages,
+                            time_limit=time_limit,
+                            solve_limit=solve_limit,
+                            memory_limit=memory_limit,
                             verbosity=verbosity,
                             buf=buf)
         resolver.solve()
@@ -253,7 +274,10 @@ class ResolvedContext(object):
         self.solve_time = resolver.solve_time
         self.load_time = resolver.load_time
         self.failure_description = resolver.failure_description
-        self.graph_ = resolver.graph
+        self.graph_ = resolver.graph_
+        self.graph_func = resolver.graph_func
+        self.seed_locks = resolver.seed_locks
+        self.solve_trace = resolver.solve_trace
         self.from_cache = resolver.from_cache
 
         if self.status_ == ResolverStatus.solved:
@@ -342,8 +366,14 @@ class ResolvedContext(object):
 
     @property
     def has_graph(self):
-        """Return True if the resolve has a graph."""
-        return bool((self.graph_ is not None) or self.graph_string)
+        """Return True if the resolve has a graph.
+
+        Note that if the graph was not stored (see the 'store_resolve_graph'
+        config setting), it is only present if it can be regenerated, see
+        `graph`.
+        """
+        return bool((self.graph_ is not None) or self.graph_string
+                    or self.graph_func or self._can_regenerate_graph)
 
     def get_resolved_package(self, name):
         """Returns a `Variant` object or None if the package is not in the
@@ -357,6 +387,63 @@ class ResolvedContext(object):
         import copy
         return copy.copy(self)
 
+    def patch(self, package_requests=None, package_subtractions=None,
+              strict=False, rank=0, incremental=None, **kwargs):
+        """Create a patched context.
+
+        The request of the new context is the patched request, see
+        `get_patched_request`.
+
+        Args:
+            package_requests, package_subtractions, strict, rank: See
+                `get_patched_request`.
+            incremental (bool): If True, packages in this context that are not
+                named in the patch are kept at their current version where
+                possible, rather than re-resolved from scratch. This is much
+                faster for large contexts. If None, defaults to
+                `config.incremental_patching`.
+            kwargs: Arguments passed to the new `ResolvedContext`. If
+                incremental, package paths, filter, orderers and the building
+                flag default to those of this context, so that the packages
+                kept from it are available in the new resolve.
+
+        Returns:
+            `ResolvedContext`: The patched context.
+        """
+        if incremental is None:
+            incremental = config.incremental_patching
+
+        package_requests = list(package_requests or [])
+        package_subtractions = list(package_subtractions or [])
+
+        # packages named in the patch are re-resolved
+        patched_names = set(package_subtractions)
+        for req in package_requests:
+            name = str(req)
+            if name.startswith('^'):
+                patched_names.add(name[1:])
+            else:
+                if isinstance(req, basestring):
+                    req = PackageRequest(req)
+                patched_names.add(req.name)
+
+        request = self.get_patched_request(
+            package_requests=package_requests,
+            package_subtractions=package_subtractions,
+            strict=strict,
+            rank=rank)
+
+        if incremental and self.success:
+            kwargs.setdefault("seed_packages",
+                              [x for x in self._resolved_packages
+                               if x.name not in patched_names])
+            kwargs.setdefault("package_paths", self.package_paths)
+            kwargs.setdefault("package_filter", self.package_filter)
+            kwargs.setdefault("package_orderers", self.package_orderers)
+            kwargs.setdefault("building", self.building)
+
+        return ResolvedContext(request, **kwargs)
+
     # TODO: deprecate in favor of patch() method
     def get_patched_request(self, package_requests=None,
                             package_subtractions=None, strict=False, rank=0):
@@ -465,6 +552,13 @@ class ResolvedContext(object):
             as_dot: If True, get the graph as a dot-language string. Otherwise,
                 a pygraph.digraph object is returned.
 
+        Note that if the graph is not present (because it was not stored in
+        the rxt file or cache entry this context was loaded from), and the
+        resolve was successful and not seeded from another context, the
+        request is resolved again, at the context's timestamp, to regenerate
+        it. Any other resolve may have depended on limits or callbacks that
+        were not saved, so it has no graph.
+
         Returns:
             A string or `pygraph.digraph` object, or None if there is no graph
             associated with the resolve.
@@ -472,6 +566,14 @@ class ResolvedContext(object):
         if not self.has_graph:
             return None
 
+        if self.graph_ is None and not self.graph_string \
+                and self.graph_func is None:
+            self.graph_func = self._regenerate_graph
+
+        if self.graph_func is not None:
+            self.graph_ = self.graph_func()
+            self.graph_func = None
+
         if not as_dot:
             if self.graph_ is None:
                 # reads either dot format or our compact format
@@ -489,6 +591,28 @@ class ResolvedContext(object):
 
         return write_dot(self.graph_)
 
+    @property
+    def _can_regenerate_graph(self):
+        # a failed or aborted resolve may have been stopped by a fail limit,
+        # callback or budget, and a seeded resolve depends on another context,
+        # so only a plain successful resolve can be repeated
+        return self.status_ == ResolverStatus.solved and not self.seed_locks
+
+    def _regenerate_graph(self):
+        resolver = Resolver(
+            package_requests=self.requested_packages(include_implicit=True),
+            package_paths=self.package_paths,
+            package_filter=self.package_filter,
+            package_orderers=self.package_orderers,
+            timestamp=self.timestamp,
+            building=self.building,
+            caching=False)
+        resolver.solve()
+
+        if resolver.graph_func is not None:
+            return resolver.graph_func()
+        return resolver.graph_
+
     def save(self, path):
         """Save the resolved context to file."""
         with open(path, 'w') as f:
@@ -731,6 +855,20 @@ class ResolvedContext(object):
             _pr("tools:", heading)
             self.print_tools(buf=buf)
 
+    def print_solve_trace(self, buf=sys.stdout):
+        """Print the solver trace as JSON lines.
+
+        Returns:
+            bool: False if the context does not contain a trace (see the
+            'solver_trace' config setting).
+        """
+        if not self.solve_trace:
+            return False
+
+        for record in self.solve_trace:
+            print >> buf, simplejson.dumps(record, sort_keys=True)
+        return True
+
     def print_tools(self, buf=sys.stdout):
         data = self.get_tools()
         if not data:
@@ -1225,9 +1363,12 @@ class ResolvedContext(object):
 
         if self.graph_string and self.graph_string.startswith('{'):
             graph_str = self.graph_string  # already in compact format
-        else:
+        elif config.store_resolve_graph and \
+                (self.graph_ is not None or self.graph_func):
             g = self.graph()
             graph_str = write_compacted(g)
+        else:
+            graph_str = None
 
         return dict(
             serialize_version=serialize_version,
@@ -1263,7 +1404,9 @@ class ResolvedContext(object):
             graph=graph_str,
             from_cache=self.from_cache,
             solve_time=self.solve_time,
-            load_time=self.load_time)
+            load_time=self.load_time,
+            solve_trace=self.solve_trace,
+            seed_locks=[str(x) for x in self.seed_locks])
 
     @classmethod
     def from_dict(cls, d, identifier_str=None):
@@ -1321,8 +1464,9 @@ class ResolvedContext(object):
         r.solve_time = d["solve_time"]
         r.load_time = d["load_time"]
 
-        r.graph_string = d["graph"]
+        r.graph_string = d.get("graph")
         r.graph_ = None
+        r.graph_func = None
 
         r._resolved_packages = []
         for d_ in d["resolved_packages"]:
@@ -1367,6 +1511,14 @@ class ResolvedContext(object):
         else:
             r.package_orderers = None
 
+        # -- SINCE SERIALIZE VERSION 4.3
+
+        r.solve_trace = d.get("solve_trace")
+
+        # -- SINCE SERIALIZE VERSION 4.4
+
+        r.seed_locks = [PackageRequest(x) for x in d.get("seed_locks", [])]
+
         return r
 
     @classmethod
@@ -1580,6 +1732,75 @@ class ResolvedContext(object):
             executor.env.PATH.append(tools_path)
 
 
+def resolve_contexts(package_requests_list, max_workers=1, **kwargs):
+    """Resolve a batch of requests.
+
+    Resolves in the same process share loaded packages and variants (see the
+    'variant_caching_maxsize' config setting), so this is considerably faster
+    than creating each context separately in its own process.
+
+    Args:
+        package_requests_list (list of list): Requests to resolve, each being
+            a list of strings or `PackageRequest` objects.
+        max_workers (int): Number of worker processes to spread the resolves
+            across. If 1 (or on platforms without fork), the resolves are
+            performed in this process.
+        kwargs: Arguments passed to each `ResolvedContext`.
+
+    Returns:
+        List of `ResolvedContext`, in the same order as the requests.
+    """
+    requests_list = [[str(x) for x in requests]
+                     for requests in package_requests_list]
+
+    if max_workers <= 1 or len(requests_list) < 2 or not hasattr(os, "fork"):
+        return [ResolvedContext(x, **kwargs) for x in requests_list]
+
+    from multiprocessing import Pool
+
+    # worker processes are forked, so kwargs (which may contain callbacks,
+    # filters etc) do not need to be pickled
+    processes = min(max_workers, len(requests_list))
+    pool = Pool(processes=processes,
+                initializer=_init_resolve_worker,
+                initargs=(kwargs,))
+    try:
+        result = pool.map(_resolve_context_worker, requests_list, chunksize=1)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    return [ResolvedContext.from_dict(x) for x in result]
+
+
+_resolve_worker_kwargs = None
+
+
+def _init_resolve_worker(kwargs):
+    from rez.utils.memcached import scoped_instance_manager
+    global _resolve_worker_kwargs
+
+    # don't share the parent's memcached sockets
+    scoped_instance_manager.clients = {}
+    _resolve_worker_kwargs = kwargs
+
+
+def _resolve_context_worker(package_requests):
+    context = ResolvedContext(package_requests, **_resolve_worker_kwargs)
+    data = context.to_dict()
+
+    # the graph generator can't be sent to the parent process, so send the
+    # graph, in compact form, even if it would not be saved. The parent can't
+    # generate it from the request, since the resolve may depend on limits,
+    # callbacks or seed packages
+    if data["graph"] is None and context.graph_func is not None:
+        data["graph"] = write_compacted(context.graph())
+    return data
+
+
 # Copyright 2013-2016 Allan Johns.
 #
 # This library is free software: you can redistribute it and/or
@@ -2,12 +2,17 @@ from rez.solver import Solver, SolverStatus, PackageVariantCache
 from rez.package_repository import package_repository_manager
 from rez.packages_ import get_variant, get_last_release_time
 from rez.package_filter import PackageFilterList, TimestampRule
-from rez.utils.memcached import memcached_client, pool_memcached_connections
+from rez.utils.memcached import pool_memcached_connections
+from rez.utils.resolve_cache import get_resolve_cache
+from rez.utils.resources import ResourceHandle
+from rez.utils.threading_ import thread_map
 from rez.utils.logging_ import log_duration
+from rez.utils.formatting import PackageRequest
 from rez.config import config
 from rez.vendor.enum import Enum
-from contextlib import contextmanager
 from hashlib import sha1
+import socket
+import time
 import os
 
 
@@ -19,7 +24,8 @@ class ResolverStatus(Enum):
     pending = ("The resolve has not yet started.", )
     solved = ("The resolve has completed successfully.", )
     failed = ("The resolve is not possible.", )
-    aborted = ("The resolve was stopped by the user (via callback).", )
+    aborted = ("The resolve was stopped, either by the user (via callback), "
+               "or because it exceeded its time, solve or memory limit.", )
 
     def __init__(self, description):
         self.description = description
@@ -31,9 +37,19 @@ class Resolver(object):
     The Resolver uses a combination of Solver(s) and cache(s) to resolve a
     package request as quickly as possible.
     """
+    # maximum number of solves attempted with `seed_packages` locked, before
+    # falling back to a normal solve
+    max_seeded_solves = 3
+
+    # seconds between checks for the result of an identical resolve running
+    # in another process, see `_wait_for_solve`
+    lease_poll_interval = 0.5
+
     def __init__(self, package_requests, package_paths, package_filter=None,
                  package_orderers=None, timestamp=0, callback=None, building=False,
-                 verbosity=False, buf=None, package_load_callback=None, caching=True):
+                 verbosity=False, buf=None, package_load_callback=None, caching=True,
+                 seed_packages=None, time_limit=None, solve_limit=None,
+                 memory_limit=None):
         """Create a Resolver.
 
         Args:
@@ -49,6 +65,19 @@ class Resolver(object):
             building: True if we're resolving for a build.
             caching: If True, cache(s) may be used to speed the resolve. If
                 False, caches will not be used.
+            seed_packages (list of `Variant`): Packages from a previous
+                resolve, typically of a similar request. If provided, the
+                solve is first attempted with each of these packages locked to
+                its previous version, so that only the remaining packages need
+                to be solved. Locks on packages involved in a failure are
+                removed and the solve retried, and if that still fails, a
+                normal solve is performed. The locks that the result was
+                solved with are available as `seed_locks` after the solve.
+            time_limit (int): See `Solver`.
+            solve_limit (int): See `Solver`.
+            memory_limit (int): See `Solver`. Budgets apply to the resolve
+                as a whole, including all solves attempted with
+                `seed_packages`.
         """
         self.package_requests = package_requests
         self.package_paths = package_paths
@@ -59,9 +88,14 @@ class Resolver(object):
         self.building = building
         self.verbosity = verbosity
         self.caching = caching
+        self.seed_packages = seed_packages
+        self.seed_locks = []  # locks the result was solved with, if any
+        self.time_limit = time_limit
+        self.solve_limit = solve_limit
+        self.memory_limit = memory_limit
         self.buf = buf
 
-        # store hash of package orderers. This is used in the memcached key
+        # store hash of package orderers. This is used in the cache key
         if package_orderers:
             sha1s = ''.join(x.sha1 for x in package_orderers)
             self.package_orderers_hash = sha1(sha1s).hexdigest()
@@ -69,7 +103,7 @@ class Resolver(object):
             self.package_orderers_hash = ''
 
         # store hash of pre-timestamp-combined package filter. This is used in
-        # the memcached key
+        # the cache key
         if package_filter:
             self.package_filter_hash = package_filter.sha1
         else:
@@ -90,8 +124,12 @@ class Resolver(object):
         self.resolved_packages_ = None
         self.failure_description = None
         self.graph_ = None
+        self.graph_func = None  # generates graph_ on demand
+        self.solve_trace = None
         self.from_cache = False
-        self.memcached_servers = config.memcached_uri if config.resolve_caching else None
+        self.resolve_cache = get_resolve_cache()
+        self._lease_key = None
+        self._budget_state = None  # carries budgets across solves
 
         self.solve_time = 0.0  # time spent solving
         self.load_time = 0.0   # time spent loading package resources
@@ -102,7 +140,7 @@ class Resolver(object):
     def solve(self):
         """Perform the solve.
         """
-        with log_duration(self._print, "memcache get (resolve) took %s"):
+        with log_duration(self._print, "cache get (resolve) took %s"):
             solver_dict = self._get_cached_solve()
 
         if solver_dict:
@@ -110,12 +148,31 @@ class Resolver(object):
             self._set_result(solver_dict)
         else:
             self.from_cache = False
-            solver = self._solve()
-            solver_dict = self._solver_to_dict(solver)
-            self._set_result(solver_dict)
-
-            with log_duration(self._print, "memcache set (resolve) took %s"):
-                self._set_cached_solve(solver_dict)
+            solver = None
+            if self.seed_packages:
+                solver = self._solve_seeded()
+
+            if solver is not None:
+                # not cached - the result depends on the seed packages
+                solver_dict = self._solver_to_dict(solver)
+                self._set_result(solver_dict)
+            else:
+                solver_dict = self._wait_for_solve()
+                if solver_dict:
+                    self.from_cache = True
+                    self._set_result(solver_dict)
+                    return
+
+                try:
+                    solver = self._solve()
+                    solver_dict = self._solver_to_dict(solver)
+                    self._set_result(solver_dict)
+
+                    with log_duration(self._print,
+                                      "cache set (resolve) took %s"):
+                        self._set_cached_solve(solver_dict)
+                finally:
+                    self._release_lease()
 
     @property
     def status(self):
@@ -141,17 +198,23 @@ class Resolver(object):
         """Return the resolve graph.
 
         The resolve graph shows unsuccessful as well as successful resolves.
+        It is generated on first access.
 
         Returns:
-            A pygraph.digraph object, or None if the solve has not completed.
+            A pygraph.digraph object, or None if the solve has not completed,
+            or the resolve came from a cache entry stored without a graph.
         """
+        if self.graph_ is None and self.graph_func is not None:
+            self.graph_ = self.graph_func()
+            self.graph_func = None
         return self.graph_
 
     def _get_cached_solve(self):
-        """Find a memcached resolve.
+        """Find a cached resolve, in memcached or the local resolve cache (see
+        `get_resolve_cache`).
 
         If there is NOT a resolve timestamp:
-            - fetch a non-timestamped memcache entry;
+            - fetch a non-timestamped cache entry;
             - if no entry, then fail;
             - if packages have changed, then:
               - delete the entry;
@@ -163,7 +226,7 @@ class Resolver(object):
               - fail.
 
         If there IS a resolve timestamp (let us call this T):
-            - fetch a non-timestamped memcache entry;
+            - fetch a non-timestamped cache entry;
             - if entry then:
               - if no packages have changed, then:
                 - if no packages in the entry have been released since:
@@ -173,7 +236,7 @@ class Resolver(object):
                   - delete the entry;
               - else:
                 - delete the entry;
-            - fetch a timestamped (T) memcache entry;
+            - fetch a timestamped (T) cache entry;
             - if no entry, then fail;
             - if packages have changed, then:
               - delete the entry;
@@ -188,11 +251,13 @@ class Resolver(object):
         consider a workflow where a work area is tied down to a particular
         timestamp in order to 'lock' it from any further software releases).
         """
-        if not (self.caching and self.memcached_servers):
+        if not (self.caching and self.resolve_cache):
             return None
 
-        # these caches avoids some potentially repeated file stats
-        variant_states = {}
+        # the state of each variant, and the last release time of each package,
+        # in the retrieved entries. These are typically file stats, so they
+        # are all fetched at once, in parallel, rather than one by one
+        variant_states = {}  # {ResourceHandle: (Variant, state handle)}
         last_release_times = {}
 
         def _hit(data):
@@ -204,29 +269,49 @@ class Resolver(object):
             return None
 
         def _delete_cache_entry(key):
-            with self._memcached_client() as client:
-                client.delete(key)
+            self.resolve_cache.delete(key)
             self._print("Discarded entry: %r", key)
 
-        def _retrieve(timestamped):
-            key = self._memcache_key(timestamped=timestamped)
-            self._print("Retrieving memcache key: %r", key)
-            with self._memcached_client() as client:
-                data = client.get(key)
-            return key, data
+        def _retrieve():
+            timestamps = (False, True) if self.timestamp else (False,)
+            keys = [self._cache_key(timestamped=x) for x in timestamps]
+            self._print("Retrieving cache keys: %r", keys)
+            datas = self.resolve_cache.get_multi(keys)
+            return zip(keys, datas)
+
+        def _variant_state(handle):
+            variant = get_variant(handle)
+            repo = variant.resource._repository
+            return variant, repo.get_variant_state_handle(variant.resource)
+
+        def _release_time(package_name):
+            return get_last_release_time(package_name, self.package_paths)
+
+        def _load_states(datas):
+            handles = set()
+            package_names = set()
+            for solver_dict, release_times_dict, _ in datas:
+                handles.update(ResourceHandle.from_dict(x)
+                               for x in solver_dict.get("variant_handles", []))
+                package_names.update(release_times_dict.iterkeys())
+
+            handles = list(handles)
+            package_names = list(package_names)
+            jobs = [(_variant_state, x) for x in handles] \
+                + [(_release_time, x) for x in package_names]
+
+            results = thread_map(lambda x: x[0](x[1]), jobs,
+                                 config.resolve_cache_validation_threads)
+            variant_states.update(zip(handles, results))
+            last_release_times.update(zip(package_names, results[len(handles):]))
 
         def _packages_changed(key, data):
             solver_dict, _, variant_states_dict = data
             for variant_handle in solver_dict.get("variant_handles", []):
-                variant = get_variant(variant_handle)
+                handle = ResourceHandle.from_dict(variant_handle)
+                variant, new_state = variant_states[handle]
                 old_state = variant_states_dict.get(variant.name)
 
-                new_state = variant_states.get(variant)
-                if new_state is None:
-                    repo = variant.resource._repository
-                    new_state = repo.get_variant_state_handle(variant.resource)
-                    variant_states[variant] = new_state
-
                 if old_state != new_state:
                     self._print("%r has been modified", variant.qualified_name)
                     return True
@@ -235,10 +320,7 @@ class Resolver(object):
         def _releases_since_solve(key, data):
             _, release_times_dict, _ = data
             for package_name, release_time in release_times_dict.iteritems():
-                time_ = last_release_times.get(package_name)
-                if time_ is None:
-                    time_ = get_last_release_time(package_name, self.package_paths)
-                    last_release_times[package_name] = time_
+                time_ = last_release_times[package_name]
 
                 if time_ != release_time:
                     self._print(
@@ -258,7 +340,9 @@ class Resolver(object):
                     return True
             return False
 
-        key, data = _retrieve(False)
+        entries = _retrieve()
+        _load_states([data for _, data in entries if data])
+        key, data = entries[0]
 
         if self.timestamp:
             if data:
@@ -267,7 +351,7 @@ class Resolver(object):
                 elif not _timestamp_is_earlier(key, data):
                     return _hit(data)
 
-            key, data = _retrieve(True)
+            key, data = entries[1]
             if not data:
                 return _miss()
             if _packages_changed(key, data):
@@ -284,14 +368,60 @@ class Resolver(object):
             else:
                 return _hit(data)
 
-    @contextmanager
-    def _memcached_client(self):
-        with memcached_client(self.memcached_servers,
-                              debug=config.debug_memcache) as client:
-            yield client
+    def _wait_for_solve(self):
+        """Wait for an identical resolve in another process to finish.
+
+        When many processes miss the same cache entry at once (such as farm
+        tasks after a package release), only one of them should solve. Before
+        solving, a lease entry is added to the resolve cache. If the lease is
+        already held elsewhere, this process instead polls the cache for the
+        result, until the lease is released or 'resolve_lease_timeout' seconds
+        have passed. A lease expires after the same time, in case its holder
+        dies.
+
+        Returns:
+            The cached solver dict, or None if this process should solve (in
+            which case it may now hold the lease, see `_release_lease`).
+        """
+        timeout = config.resolve_lease_timeout
+        if not (self.caching and self.resolve_cache and timeout > 0):
+            return None
+
+        key = "lease:%s" % self._cache_key(timestamped=True)
+        lease = dict(host=socket.gethostname(),
+                     pid=os.getpid(),
+                     time=int(time.time()))
+
+        if self.resolve_cache.add(key, lease, timeout):
+            self._lease_key = key
+            return None
+
+        self._print("Waiting on resolve in another process: %r", key)
+        end_time = time.time() + timeout
+
+        while time.time() < end_time:
+            time.sleep(self.lease_poll_interval)
+
+            # the result is stored before the lease is released, so check
+            # the lease first
+            leased = self.resolve_cache.exists(key)
+            solver_dict = self._get_cached_solve()
+            if solver_dict:
+                return solver_dict
+            if not leased:
+                # finished without storing a result, eg the resolve failed
+                break
+
+        self._print("No result from other process, solving locally")
+        return None
+
+    def _release_lease(self):
+        if self._lease_key:
+            self.resolve_cache.delete(self._lease_key)
+            self._lease_key = None
 
     def _set_cached_solve(self, solver_dict):
-        """Store a solve to memcached.
+        """Store a solve to the resolve cache.
 
         If there is NOT a resolve timestamp:
             - store the solve to a non-timestamped entry.
@@ -305,7 +435,7 @@ class Resolver(object):
         if self.status_ != ResolverStatus.solved:
             return  # don't cache failed solves
 
-        if not (self.caching and self.memcached_servers):
+        if not (self.caching and self.resolve_cache):
             return
 
         # most recent release times get stored with solve result in the cache
@@ -318,7 +448,7 @@ class Resolver(object):
 
             # don't cache if a release time isn't known
             if time_ == 0:
-                self._print("Did not send memcache key: a repository could "
+                self._print("Did not store cache key: a repository could "
                             "not provide a most recent release time for %r",
                             variant.name)
                 return
@@ -331,15 +461,26 @@ class Resolver(object):
             variant_states_dict[variant.name] = \
                 repo.get_variant_state_handle(variant.resource)
 
+        # the graph generator can't be pickled, store the graph itself instead
+        solver_dict = solver_dict.copy()
+        del solver_dict["graph_func"]
+        solver_dict["graph"] = self.graph if config.store_resolve_graph else None
+
         timestamped = (self.timestamp and releases_since_solve)
-        key = self._memcache_key(timestamped=timestamped)
+        key = self._cache_key(timestamped=timestamped)
         data = (solver_dict, release_times_dict, variant_states_dict)
-        with self._memcached_client() as client:
-            client.set(key, data)
-        self._print("Sent memcache key: %r", key)
 
-    def _memcache_key(self, timestamped=False):
-        """Makes a key suitable as a memcache entry."""
+        # failing to store is not a reason to fail the resolve
+        try:
+            self.resolve_cache.set(key, data)
+        except Exception as e:
+            self._print("Did not store cache key %r: %s", key, e)
+            return
+
+        self._print("Stored cache key: %r", key)
+
+    def _cache_key(self, timestamped=False):
+        """Makes a key suitable as a resolve cache entry."""
         request = tuple(map(str, self.package_requests))
         repo_ids = []
         for path in self.package_paths:
@@ -359,8 +500,11 @@ class Resolver(object):
 
         return str(tuple(t))
 
-    def _solve(self):
-        solver = Solver(package_requests=self.package_requests,
+    def _solve(self, package_requests=None):
+        if package_requests is None:
+            package_requests = self.package_requests
+
+        solver = Solver(package_requests=package_requests,
                         package_paths=self.package_paths,
                         package_filter=self.package_filter,
                         package_orderers=self.package_orderers,
@@ -369,17 +513,52 @@ class Resolver(object):
                         building=self.building,
                         verbosity=self.verbosity,
                         prune_unfailed=config.prune_failed_graph,
+                        time_limit=self.time_limit,
+                        solve_limit=self.solve_limit,
+                        memory_limit=self.memory_limit,
+                        budget_start=self._budget_state,
                         buf=self.buf)
         solver.solve()
 
+        self._budget_state = solver.get_budget_state()
         return solver
 
+    def _solve_seeded(self):
+        # returns the solver, or None if a normal solve should be done instead
+        unlocked = set()
+
+        for _ in range(self.max_seeded_solves):
+            locks = []
+            for variant in self.seed_packages:
+                if variant.name not in unlocked:
+                    request = "~%s==%s" % (variant.name, str(variant.version))
+                    locks.append(PackageRequest(request))
+
+            if not locks:
+                break
+
+            solver = self._solve(self.package_requests + locks)
+            if solver.status != SolverStatus.failed:
+                self.seed_locks = locks
+                return solver  # solved, or aborted by a budget
+
+            # unlock the packages involved in the failure and try again
+            names = set(x.name for x in solver.failure_packages())
+            names &= set(x.name for x in locks)
+            if not names:
+                break
+            unlocked |= names
+
+        return None
+
     def _set_result(self, solver_dict):
         self.status_ = solver_dict.get("status")
         self.graph_ = solver_dict.get("graph")
+        self.graph_func = solver_dict.get("graph_func")
         self.solve_time = solver_dict.get("solve_time")
         self.load_time = solver_dict.get("load_time")
         self.failure_description = solver_dict.get("failure_description")
+        self.solve_trace = solver_dict.get("trace")
 
         self.resolved_packages_ = None
         if self.status_ == ResolverStatus.solved:
@@ -391,7 +570,9 @@ class Resolver(object):
 
     @classmethod
     def _solver_to_dict(cls, solver):
-        graph_ = solver.get_graph()
+        # the graph is expensive to generate for large resolves, and is rarely
+        # needed. Keep what is needed to generate it on demand
+        graph_func = solver.get_graph_func()
         solve_time = solver.solve_time
         load_time = solver.load_time
         failure_description = None
@@ -414,11 +595,13 @@ class Resolver(object):
 
         return dict(
             status=status_,
-            graph=graph_,
+            graph=None,
+            graph_func=graph_func,
             solve_time=solve_time,
             load_time=load_time,
             failure_description=failure_description,
-            variant_handles=variant_handles)
+            variant_handles=variant_handles,
+            trace=solver.get_trace())
 
 
 # Copyright 2013-2016 Allan Johns.
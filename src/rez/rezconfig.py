@@ -84,11 +84,57 @@ bind_module_path = []
 # Caching
 ###############################################################################
 
-# Cache resolves to memcached, if enabled. Note that these cache entries will be
+# Cache resolves to memcached (or to the local resolve cache, see
+# 'resolve_cache_path'), if enabled. Note that these cache entries will be
 # correctly invalidated if, for example, a newer package version is released that
 # would change the result of an existing resolve.
 resolve_caching = True
 
+# Directory of a local resolve cache, used when 'memcached_uri' is not set. This
+# allows resolve caching on hosts that have no memcached server. The directory
+# can be shared by any number of processes of the same user. It must not be
+# shared between users: entries are loaded with pickle, so entries not owned by
+# the current user are ignored. A per-user location such as
+# "~/.rez/resolve_cache" is recommended. If null, resolves are only cached to
+# memcached.
+resolve_cache_path = None
+
+# Maximum total size of the local resolve cache, in megabytes. When exceeded,
+# the least recently used entries are deleted. A value of -1 means no limit.
+resolve_cache_max_size = 200
+
+# The number of threads used to check that a cached resolve is still valid. The
+# check stats each package in the resolve, and each of their families, which
+# is slow if done one at a time on a network filesystem.
+resolve_cache_validation_threads = 8
+
+# When many processes perform the same resolve at the same time (and miss the
+# resolve cache), only one of them solves, while the others wait up to this many
+# seconds for its result to appear in the cache, before solving themselves. A
+# value of 0 disables this.
+resolve_lease_timeout = 30
+
+# Directory in which to cache loaded package definition files, so that other
+# processes do not need to read and evaluate them again. This is useful when
+# memcached is not available, and is used in addition to memcached otherwise.
+# Entries are keyed on each file's path, inode, modification time and size, so
+# updated package files are still read correctly. Use 'rez-diskcache' to inspect
+# or clear the cache. If null, package files are not cached on disk. A per-user
+# location such as "~/.rez/package_cache" is recommended.
+package_file_cache_path = None
+
+# The maximum size of the package file cache, in megabytes. When exceeded, the
+# least recently used entries are deleted. A value of -1 means no limit.
+package_file_cache_max_size = 500
+
+# The number of threads used to load package definition files ahead of tools
+# that read many packages one after another, such as rez-search and rez-gui.
+# Packages are still processed in order, but files are read in the background
+# while earlier packages are being processed, which helps when packages are on
+# a slow (eg network) filesystem. A value of 0 or 1 disables this, which is the
+# default, since it only pays off on slow filesystems.
+package_load_threads = 0
+
 # Cache package file reads to memcached, if enabled. Updated package files will
 # still be read correctly (ie, the cache invalidates when the filesystem
 # changes).
@@ -104,6 +150,22 @@ cache_listdir = True
 # of unlimited size. The size refers to the number of entries, not byte count.
 resource_caching_maxsize = -1
 
+# The size of the in-process cache of package variants that is shared between
+# resolves. This means that the second and later resolves in a process don't
+# need to load the same packages again. Before an entry is used, the last
+# release time of its package family is checked, so newly released packages
+# are still seen. A value of 0 disables caching; -1 sets a cache of unlimited
+# size. The size refers to the number of package families, not byte count.
+variant_caching_maxsize = 500
+
+# The size of the in-process caches of parsed versions, version ranges and
+# requirements, and of the results of version range operations (such as
+# intersections) performed by the solver. Hit rates of these caches are shown
+# in the solver trace (see 'solver_trace'). A value of 0 disables caching; -1
+# sets a cache of unlimited size. The size refers to the number of entries in
+# each cache, not byte count. Takes effect when a resolve starts.
+version_caching_maxsize = 20000
+
 # Uris of running memcached server(s) to use as a file and resolve cache. For
 # example, the uri "127.0.0.1:11211" points to memcached running on localhost on
 # its default port. Must be either null, or a list of strings.
@@ -163,6 +225,17 @@ platform_map = {}
 # failure.
 prune_failed_graph = True
 
+# If true, the resolve graph is stored in saved contexts (rxt files) and in
+# cached resolves. The graph is only generated when first needed, which on
+# large resolves is a noticeable cost. If false, this cost is avoided, but a
+# context loaded without a graph can only regenerate it (for example in
+# 'rez-context --graph') by resolving its request again at the context's
+# timestamp. This is only done for successful resolves that were not seeded
+# from another context (see 'incremental_patching'), since other resolves may
+# have been shaped by limits and callbacks that are not saved. Other contexts
+# have no graph.
+store_resolve_graph = True
+
 # Variant select mode. This determines which variants in a package are preferred
 # during a solve. Valid options are:
 # - version_priority: Prefer variants that contain higher versions of packages
@@ -246,6 +319,53 @@ package_filter = None
 # this value is False.
 allow_unversioned_packages = True
 
+# The maximum number of child processes the solver may use to speculatively
+# explore alternative branches of a solve, while the main process explores the
+# preferred branch. This can reduce the time taken by difficult resolves (ones
+# with many failed attempts) on multi-core hosts. The result of the resolve is
+# the same regardless of this setting. Zero disables speculation. Ignored on
+# platforms that do not support fork.
+speculative_solve_workers = 0
+
+# The maximum number of threads the solver may use to load package families in
+# the background, as soon as they are required by a package in the resolve. This
+# overlaps package loading with solving, which helps when packages are on a slow
+# (eg network) filesystem. The result of the resolve is the same regardless of
+# this setting. Packages excluded by package filters are not loaded, and the
+# threads are stopped before the solve returns. Zero disables prefetching, as
+# does speculative solving.
+solver_prefetch_threads = 0
+
+# When a context is patched (for example, using 'rez-env --patch', or the '++patch'
+# option of a suite tool), keep packages not named in the patch at their current
+# version where possible, rather than re-resolving the whole request. This is
+# much faster for large contexts, however unrelated packages will not pick up
+# newer versions, as they would in a fresh resolve.
+incremental_patching = False
+
+# Gather a structured trace of each resolve - counts and timings of each solver
+# operation, package load times per family, and the depth of the solve. The
+# trace is stored in the context, and can be printed as JSON lines with
+# 'rez-context --print-trace'. This has a small cost, so is disabled by default.
+solver_trace = False
+
+# Budgets for a single resolve. A resolve that exceeds any of these is stopped,
+# and reported as aborted. The abort message shows the deepest phase the solve
+# reached, and the package families most often involved in conflicts, which
+# usually indicates how the request should be narrowed. A value of -1 means no
+# limit. Budgets cover the whole resolve, including every solve attempted when
+# patching incrementally (see 'incremental_patching').
+#
+# - resolve_time_limit: Maximum time taken by the resolve, in seconds;
+# - resolve_solve_limit: Maximum number of solve steps;
+# - resolve_memory_limit: Maximum growth in peak memory (maximum resident set
+#   size) of the process during the resolve, in megabytes. Memory up to an
+#   earlier peak is reused without being counted, so this does not limit the
+#   current memory usage. Ignored on Windows.
+resolve_time_limit = -1
+resolve_solve_limit = -1
+resolve_memory_limit = -1
+
 
 ###############################################################################
 # Environment Resolution
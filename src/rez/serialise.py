@@ -1,5 +1,6 @@
 """
-Read and write data from file. File caching via a memcached server is supported.
+Read and write data from file. File caching via a memcached server, and/or a
+local directory, is supported.
 """
 from rez.utils.scope import ScopeContext
 from rez.utils.data_utils import SourceCode
@@ -7,6 +8,7 @@ from rez.utils.logging_ import print_debug
 from rez.utils.filesystem import TempDirs
 from rez.exceptions import ResourceError
 from rez.utils.memcached import memcached
+from rez.utils.disk_cache import DiskCache
 from rez.config import config
 from rez.vendor.enum import Enum
 from rez.vendor import yaml
@@ -24,6 +26,9 @@ tmpdir_manager = TempDirs(config.tmpdir, prefix="rez_write_")
 file_cache = {}
 
 
+_package_file_caches = {}
+
+
 class FileFormat(Enum):
     py = ("py",)
     yaml = ("yaml",)
@@ -101,12 +106,60 @@ def _load_from_file__key(filepath, format_, update_data_callback):
                 st.st_ino, st.st_mtime))
 
 
+def _package_file_cache_key(filepath, format_, update_data_callback):
+    # unlike the memcached key, includes the size, since the package file
+    # cache persists for longer
+    key = _load_from_file__key(filepath, format_, update_data_callback)
+    return str((key, os.stat(filepath).st_size))
+
+
 @memcached(servers=config.memcached_uri if config.cache_package_files else None,
            min_compress_len=config.memcached_package_file_min_compress_len,
            key=_load_from_file__key,
            debug=config.debug_memcache)
 def _load_from_file(filepath, format_, update_data_callback):
-    return _load_file(filepath, format_, update_data_callback)
+    cache = get_package_file_cache()
+    if cache is None:
+        return _load_file(filepath, format_, update_data_callback)
+
+    key = _package_file_cache_key(filepath, format_, update_data_callback)
+    data = cache.get(key)
+    if data is None:
+        data = _load_file(filepath, format_, update_data_callback)
+
+        # the cache is an optimisation, failing to store is not an error
+        try:
+            cache.set(key, data)
+        except Exception as e:
+            if config.debug("file_loads"):
+                print_debug("Did not cache file %s: %s" % (filepath, e))
+    return data
+
+
+def get_package_file_cache():
+    """Get the local cache of loaded package files.
+
+    Loaded files are cached in the directory 'package_file_cache_path', if
+    set. Entries are keyed on the file's path, inode, modification time and
+    size, so a changed file is never read from the cache.
+
+    Returns:
+        `DiskCache`, or None if the cache is not configured.
+    """
+    path = config.package_file_cache_path
+    if not path:
+        return None
+
+    path = os.path.expanduser(path)
+    max_size = config.package_file_cache_max_size
+    max_size = None if max_size < 0 else max_size * 1024 * 1024
+
+    key = (path, max_size)
+    cache = _package_file_caches.get(key)
+    if cache is None:
+        cache = DiskCache(path, max_size=max_size, evict_interval=100)
+        _package_file_caches[key] = cache
+    return cache
 
 
 def _load_file(filepath, format_, update_data_callback):
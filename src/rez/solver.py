@@ -102,11 +102,13 @@ The pseudocode for a solve looks like this::
                     set_fail()
                     return
 
-There are 2 notable points missing from the pseudocode, related to optimisations:
+There are 3 notable points missing from the pseudocode, related to optimisations:
 
 * Scopes keep a set of package families so that they can quickly skip unnecessary
   reductions. For example, all 'foo' pkgs may depend only on the set (python, bah),
-  so when reduced against 'maya', this becomes basically a no-op.
+  so when reduced against 'maya', this becomes basically a no-op. Phases also
+  keep a reverse index of these sets, so that when a scope changes, reductions
+  are only scheduled against the scopes that reference its package family.
 
 * Objects in the solver (phases, scopes etc) are immutable. Whenever a change
   occurs - such as a scope being narrowed as a result of an intersect - what
@@ -114,11 +116,17 @@ There are 2 notable points missing from the pseudocode, related to optimisations
   of the previous object. This is basically implementing copy-on-demand - lots of
   scopes are shared between phases in the stack, if objects were not immutable
   then creating a new phase would involve a deep copy of the entire state of the
-  solver.
+  solver. Phases take this further by storing only the scopes that changed
+  relative to a scope list shared with other phases.
+
+* When a phase fails, the scopes involved in the failure are remembered as a
+  'nogood'. Any later phase whose scopes are at least as narrow as a nogood is
+  failed immediately, rather than rediscovering the same conflict.
 """
 from rez.config import config
 from rez.packages_ import iter_packages
-from rez.package_repository import package_repo_stats
+from rez.package_repository import package_repo_stats, \
+    package_repository_manager
 from rez.utils.logging_ import print_debug
 from rez.utils.data_utils import cached_property
 from rez.vendor.pygraph.classes.digraph import digraph
@@ -126,13 +134,24 @@ from rez.vendor.pygraph.algorithms.cycles import find_cycle
 from rez.vendor.pygraph.algorithms.accessibility import accessibility
 from rez.exceptions import PackageNotFoundError, ResolveError, \
     PackageFamilyNotFoundError, RezSystemError
-from rez.vendor.version.version import Version, VersionRange
+from rez.vendor.version.version import Version, VersionRange, \
+    get_cache_stats, set_cache_size
 from rez.vendor.version.requirement import VersionedObject, Requirement, \
     RequirementList
 from rez.vendor.enum import Enum
+from rez.backport.ordereddict import OrderedDict
+import threading
+import functools
+import heapq
 import copy
 import time
 import sys
+import os
+
+try:
+    import resource
+except ImportError:
+    resource = None
 
 
 class VariantSelectMode(Enum):
@@ -214,6 +233,54 @@ class _Printer(object):
         return self.verbosity
 
 
+class _Tracer(object):
+    """Gathers structured statistics about a solve.
+
+    Unlike `_Printer`, this records data rather than text, so it can be
+    written out as JSON lines and analysed later. As with `_Printer`, callers
+    should test the tracer's truthiness before doing any work on its behalf, so
+    that tracing costs next to nothing when disabled.
+    """
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.records = []
+        self.counts = {}       # {operation: count}
+        self.times = {}        # {operation: secs}
+        self.load_times = {}   # {package-family: secs}
+        self.max_depth = 0
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def add_time(self, name, secs):
+        self.times[name] = self.times.get(name, 0.0) + secs
+
+    def add_load_time(self, package_name, secs):
+        self.load_times[package_name] = \
+            self.load_times.get(package_name, 0.0) + secs
+
+    def event(self, event, **data):
+        data["event"] = event
+        data["time"] = time.time()
+        self.records.append(data)
+
+    def get_records(self):
+        """Get the trace, ending in a summary record.
+
+        Returns:
+            List of dicts.
+        """
+        summary = dict(event="summary",
+                       counts=self.counts,
+                       times=self.times,
+                       load_times=self.load_times,
+                       max_depth=self.max_depth)
+        return self.records + [summary]
+
+    def __nonzero__(self):
+        return self.enabled
+
+
 class SolverState(object):
     """Represent the current state of the solver instance for use with a
     callback.
@@ -229,6 +296,8 @@ class SolverState(object):
 
 
 class _Common(object):
+    __slots__ = ()
+
     def __repr__(self):
         return "%s(%s)" % (self.__class__.__name__, str(self))
 
@@ -442,6 +511,8 @@ class _PackageEntry(object):
 
     Holds some extra state data, such as whether the variants are sorted.
     """
+    __slots__ = ("package", "variants", "solver", "sorted")
+
     def __init__(self, package, variants, solver):
         self.package = package
         self.variants = variants
@@ -490,37 +561,7 @@ class _PackageEntry(object):
         if self.sorted:
             return
 
-        def key(variant):
-            requested_key = []
-            names = set()
-
-            for i, request in enumerate(self.solver.request_list):
-                if not request.conflict:
-                    req = variant.requires_list.get(request.name)
-                    if req is not None:
-                        requested_key.append((-i, req.range))
-                        names.add(req.name)
-
-            additional_key = []
-            for request in variant.requires_list:
-                if not request.conflict and request.name not in names:
-                    additional_key.append((request.range, request.name))
-
-            if (VariantSelectMode[config.variant_select_mode] ==
-                    VariantSelectMode.version_priority):
-                k = (requested_key,
-                     -len(additional_key),
-                     additional_key,
-                     variant.index)
-            else:  # VariantSelectMode.intersection_priority
-                k = (len(requested_key),
-                     requested_key,
-                     -len(additional_key),
-                     additional_key,
-                     variant.index)
-
-            return k
-
+        key = self.solver.package_cache.get_variant_sort_key
         self.variants.sort(key=key, reverse=True)
         self.sorted = True
 
@@ -532,11 +573,15 @@ class _PackageVariantList(_Common):
         self.package_name = package_name
         self.solver = solver
 
+        # the packages, and their variants once loaded, are shared with other
+        # solvers searching the same package paths
+        self.shared_entries, self.versions = \
+            solver.package_cache.get_shared_entries(package_name)
+
         # note: we do not apply package filters here, because doing so might
         # cause package loads (eg, timestamp rules). We only apply filters
         # during an intersection, which minimises the amount of filtering.
-        it = iter_packages(self.package_name, paths=self.solver.package_paths)
-        self.entries = [[x, False] for x in it]
+        self.entries = [[x[0], False] for x in self.shared_entries]
 
         if not self.entries:
             raise PackageFamilyNotFoundError(
@@ -552,34 +597,53 @@ class _PackageVariantList(_Common):
         Returns:
             List of `_PackageEntry` objects.
         """
+        if range_.is_any():
+            spans = [(0, len(self.entries))]
+        else:
+            spans = range_.get_intersecting_spans(self.versions)
+
         result = []
 
-        for entry in self.entries:
-            package, value = entry
+        for start, end in spans:
+            for i in xrange(start, end):
+                entry_ = self._get_entry(i)
+                if entry_ is not None:
+                    result.append(entry_)
 
-            if value is None:
-                continue  # package was blocked by package filters
+        return result or None
 
-            if package.version not in range_:
-                continue
+    def _get_entry(self, i):
+        # get the i'th entry as a `_PackageEntry`, loading its variants if
+        # needed. Returns None if the package is excluded by package filters
+        entry = self.entries[i]
+        package, value = entry
+
+        if value is None:
+            return None  # package was blocked by package filters
+
+        if isinstance(value, list):
+            variants = value
+            return _PackageEntry(package, variants, self.solver)
+
+        # apply package filter
+        if self.solver.package_filter:
+            rule = self.solver.package_filter.excludes(package)
+            if rule:
+                if config.debug_package_exclusions:
+                    print_debug("Package '%s' was excluded by rule '%s'"
+                                % (package.qualified_name, str(rule)))
+                entry[1] = None
+                return None
 
-            if isinstance(value, list):
-                variants = value
-                entry_ = _PackageEntry(package, variants, self.solver)
-                result.append(entry_)
-                continue
+        # expand package entry into list of variants
+        shared_entry = self.shared_entries[i]
+        variants_ = shared_entry[1]
 
-            # apply package filter
-            if self.solver.package_filter:
-                rule = self.solver.package_filter.excludes(package)
-                if rule:
-                    if config.debug_package_exclusions:
-                        print_debug("Package '%s' was excluded by rule '%s'"
-                                    % (package.qualified_name, str(rule)))
-                    entry[1] = None
-                    continue
+        if variants_ is None:
+            tr = self.solver.tr
+            if tr:
+                t1 = time.time()
 
-            # expand package entry into list of variants
             if self.solver.package_load_callback:
                 self.solver.package_load_callback(package)
 
@@ -588,11 +652,16 @@ class _PackageVariantList(_Common):
                 variant = PackageVariant(var, self.solver.building)
                 variants_.append(variant)
 
-            entry[1] = variants_
-            entry_ = _PackageEntry(package, variants_, self.solver)
-            result.append(entry_)
+            shared_entry[1] = variants_
 
-        return result or None
+            if tr:
+                tr.count("package_load")
+                tr.add_load_time(self.package_name, time.time() - t1)
+
+        # take a copy, variants are sorted in-place wrt the request
+        variants_ = variants_[:]
+        entry[1] = variants_
+        return _PackageEntry(package, variants_, self.solver)
 
     def dump(self):
         print self.package_name
@@ -625,8 +694,17 @@ class _PackageVariantList(_Common):
         return "%s[%s]" % (self.package_name, ' '.join(strs))
 
 
+# shared by slices until they need a set of their own
+_empty_set = frozenset()
+
+
 class _PackageVariantSlice(_Common):
     """A subset of a variant list, but with more dependency-related info."""
+    __slots__ = ("solver", "package_name", "entries", "extracted_fams",
+                 "been_reduced_by", "been_intersected_with", "sorted",
+                 "_memos_shared", "_len", "_range", "_fam_requires",
+                 "_common_fams", "_variant_set")
+
     def __init__(self, package_name, entries, solver):
         """
         Args:
@@ -636,16 +714,18 @@ class _PackageVariantSlice(_Common):
         self.solver = solver
         self.package_name = package_name
         self.entries = entries
-        self.extracted_fams = set()
-        self.been_reduced_by = set()
-        self.been_intersected_with = set()
+        self.extracted_fams = _empty_set
+        self.been_reduced_by = _empty_set
+        self.been_intersected_with = _empty_set
         self.sorted = False
+        self._memos_shared = True
 
         # calculated on demand
         self._len = None
         self._range = None
         self._fam_requires = None
         self._common_fams = None
+        self._variant_set = None
 
     @property
     def pr(self):
@@ -668,6 +748,12 @@ class _PackageVariantSlice(_Common):
         self._update_fam_info()
         return self._common_fams
 
+    @property
+    def variant_set(self):
+        if self._variant_set is None:
+            self._variant_set = frozenset(self.iter_variants())
+        return self._variant_set
+
     @property
     def extractable(self):
         """True if there are possible remaining extractions."""
@@ -702,9 +788,11 @@ class _PackageVariantSlice(_Common):
             return None
         elif len(entries) < len(self.entries):
             copy_ = self._copy(entries)
+            copy_._own_memos()
             copy_.been_intersected_with.add(range_)
             return copy_
         else:
+            self._own_memos()
             self.been_intersected_with.add(range_)
             return self
 
@@ -765,7 +853,9 @@ class _PackageVariantSlice(_Common):
             if n < len(entry):
                 if n == 0:
                     continue
+                sorted_ = entry.sorted  # removing variants keeps the order
                 entry = _PackageEntry(entry.package, new_variants, self.solver)
+                entry.sorted = sorted_
 
             entries.append(entry)
 
@@ -773,9 +863,11 @@ class _PackageVariantSlice(_Common):
             return (None, reductions)
         elif reductions:
             copy_ = self._copy(new_entries=entries)
+            copy_._own_memos()
             copy_.been_reduced_by.add(package_request)
             return (copy_, reductions)
         else:
+            self._own_memos()
             self.been_reduced_by.add(package_request)
             return (self, [])
 
@@ -916,10 +1008,23 @@ class _PackageVariantSlice(_Common):
                                       solver=self.solver)
 
         slice_.sorted = self.sorted
-        slice_.been_reduced_by = self.been_reduced_by.copy()
-        slice_.been_intersected_with = self.been_intersected_with.copy()
+
+        # A subset of variants is reduced/intersected by everything this slice
+        # was, so the memo sets are shared until the copy needs to modify them.
+        # Changes made to them by this slice remain valid for the copy.
+        slice_.been_reduced_by = self.been_reduced_by
+        slice_.been_intersected_with = self.been_intersected_with
+        slice_._memos_shared = True
         return slice_
 
+    def _own_memos(self):
+        # copy the memo sets if they may be shared with other slices, so they
+        # can be modified
+        if self._memos_shared:
+            self.been_reduced_by = set(self.been_reduced_by)
+            self.been_intersected_with = set(self.been_intersected_with)
+            self._memos_shared = False
+
     def _update_fam_info(self):
         if self._common_fams is not None:
             return
@@ -932,6 +1037,10 @@ class _PackageVariantSlice(_Common):
             self._fam_requires |= (variant.request_fams |
                                    variant.conflict_request_fams)
 
+        package_cache = self.solver.package_cache
+        if package_cache.prefetching:
+            package_cache.prefetch(self.iter_variants())
+
     def __len__(self):
         if self._len is None:
             self._len = 0
@@ -974,10 +1083,292 @@ class _PackageVariantSlice(_Common):
         return s + strextr
 
 
+class _SharedVariantCache(object):
+    """In-process cache of packages and their variants, shared by solvers.
+
+    Entries are keyed on the package search path, the uids of the repositories
+    in it, and whether a build is occurring. Each entry is the list of packages
+    in a family in ascending version order, along with its variants once they
+    have been loaded, and the list of package versions. Package filters are not
+    applied here, since they vary between solvers.
+
+    Each entry also records the last release time of the family in each
+    repository. If this has changed when the entry is next used, the caches of
+    the repositories concerned are cleared, and the family is loaded again.
+    """
+    def __init__(self):
+        self.entries = OrderedDict()  # {(key, package_name): (state, entries)}
+        self.lock = threading.Lock()
+
+    def get_entries(self, key, package_name, package_paths):
+        """Get the packages of a family, loading them if not cached.
+
+        Returns:
+            2-tuple:
+            - List of [`Package`, variants] lists, in ascending version order,
+              where variants is a list of `PackageVariant`, or None if not yet
+              loaded;
+            - List of the `Version` of each package.
+        """
+        maxsize = config.variant_caching_maxsize
+        key = (key, package_name)
+        state = None
+
+        if maxsize:
+            with self.lock:
+                value = self.entries.pop(key, None)
+                if value is not None:
+                    self.entries[key] = value
+
+            repos = self._get_repositories(package_paths)
+            state = self._get_state(package_name, repos)
+
+            if value is not None:
+                if value[0] == state:
+                    return value[1]
+
+                # packages have been released since, so the repositories'
+                # own caches are stale too
+                for repo, time_, time2 in zip(repos, value[0], state):
+                    if time_ != time2:
+                        repo.clear_caches()
+                state = self._get_state(package_name, repos)
+
+        it = iter_packages(package_name, paths=package_paths)
+        packages = sorted(it, key=lambda x: x.version)
+        entries = ([[x, None] for x in packages],
+                   [x.version for x in packages])
+
+        if maxsize and packages:
+            with self.lock:
+                self.entries[key] = (state, entries)
+                if maxsize > 0:
+                    while len(self.entries) > maxsize:
+                        self.entries.popitem(last=False)
+
+        return entries
+
+    @classmethod
+    def _get_repositories(cls, package_paths):
+        paths = config.packages_path if package_paths is None else package_paths
+        return [package_repository_manager.get_repository(x) for x in paths]
+
+    @classmethod
+    def _get_state(cls, package_name, repos):
+        # last release time of the family in each repository
+        state = []
+        for repo in repos:
+            family = repo.get_package_family(package_name)
+            state.append(repo.get_last_release_time(family) if family else None)
+        return tuple(state)
+
+    def clear(self, repository_uid=None):
+        """Clear cached entries.
+
+        Args:
+            repository_uid: If provided, only entries involving the repository
+                with this uid are cleared.
+        """
+        with self.lock:
+            if repository_uid is None:
+                self.entries.clear()
+            else:
+                keys = [x for x in self.entries.iterkeys()
+                        if repository_uid in x[0][1]]
+                for key in keys:
+                    del self.entries[key]
+
+
+# singleton
+shared_variant_cache = _SharedVariantCache()
+
+
 class PackageVariantCache(object):
     def __init__(self, solver):
         self.solver = solver
         self.variant_lists = {}  # {package-name: _PackageVariantList}
+        self.variant_sort_keys = {}  # {PackageVariant: key}
+        self._shared_key = None
+        self._request_indices = None
+        self._variant_select_mode = None
+        self.prefetch_threads = solver.prefetch_threads
+        self._prefetches = {}  # {package-name: AsyncResult}
+        self._pool = None
+        self._stopped = False
+
+    @property
+    def prefetching(self):
+        """True if families are being prefetched, see `prefetch`."""
+        return bool(self.prefetch_threads)
+
+    def prefetch(self, variants):
+        """Load the families required by the given variants in the background.
+
+        Each family not yet loaded is listed on a thread pool, and the packages
+        in the range required of it are loaded, so that this I/O overlaps with
+        solving. When the solver later needs the family, it takes the listing
+        from the prefetch (waiting for it if necessary), and finds the package
+        data already loaded. Results are the same as without prefetching, and
+        any error is raised by the solver's own load of the family, rather
+        than by the prefetch.
+
+        Packages excluded by the solver's package filter are not loaded. If
+        the solver has a package load callback, families are only listed, so
+        that the callback is still called before each package is loaded.
+
+        Args:
+            variants (list of `PackageVariant`): Variants in a scope.
+        """
+        ranges = {}
+        for variant in variants:
+            for request in variant.requires_list.requirements:
+                name = request.name
+                if request.conflict or name in self.variant_lists \
+                        or name in self._prefetches:
+                    continue
+
+                range_ = ranges.get(name)
+                ranges[name] = (request.range if range_ is None
+                                else range_ | request.range)
+
+        if not ranges:
+            return
+
+        if self._pool is None:
+            from multiprocessing.pool import ThreadPool
+            self._pool = ThreadPool(self.prefetch_threads)
+
+        for name, range_ in sorted(ranges.iteritems()):
+            self._prefetches[name] = self._pool.apply_async(
+                self._prefetch, (name, range_))
+
+        if self.solver.tr:
+            self.solver.tr.count("prefetch", len(ranges))
+
+    def stop_prefetching(self):
+        """Stop the prefetch threads. Pending prefetches are abandoned, and
+        families are loaded as they're needed from then on. This waits for
+        prefetches already running to finish, so that no prefetch thread
+        outlives the solve."""
+        self._prefetches = {}
+        self.prefetch_threads = 0
+        self._stopped = True
+
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def get_shared_entries(self, package_name):
+        """Get the packages of a family, and their versions, from the shared
+        variant cache. See `_SharedVariantCache.get_entries`."""
+        prefetch = self._prefetches.pop(package_name, None)
+        if prefetch is not None:
+            try:
+                result = prefetch.get()
+                if result is not None:
+                    return result
+            except Exception:
+                pass  # load it here, so the error is raised by the solver
+
+        return self._get_shared_entries(package_name)
+
+    def _prefetch(self, package_name, range_):
+        # runs on a prefetch thread
+        if self._stopped:
+            return None
+
+        entries, versions = self._get_shared_entries(package_name)
+        if self.solver.package_load_callback:
+            return entries, versions
+
+        if range_.is_any():
+            spans = [(0, len(entries))]
+        else:
+            spans = range_.get_intersecting_spans(versions)
+
+        package_filter = self.solver.package_filter
+
+        try:
+            for start, end in spans:
+                for package, variants in entries[start:end]:
+                    if self._stopped:
+                        break
+                    if variants is not None:
+                        continue
+                    if package_filter and package_filter.excludes(package):
+                        continue
+                    package.data  # loads the package definition
+        except Exception:
+            pass  # raised again when the solver loads the package
+
+        return entries, versions
+
+    def _get_shared_entries(self, package_name):
+        if self._shared_key is None:
+            paths = self.solver.package_paths
+            if paths is None:
+                paths = config.packages_path
+
+            uids = tuple(package_repository_manager.get_repository(x).uid
+                         for x in paths)
+            self._shared_key = (tuple(paths), uids, self.solver.building)
+
+        return shared_variant_cache.get_entries(
+            key=self._shared_key,
+            package_name=package_name,
+            package_paths=self.solver.package_paths)
+
+    def get_variant_sort_key(self, variant):
+        """Get the key that a variant is sorted by, see `_PackageEntry.sort`.
+
+        Keys are calculated once per variant, and contain the primitive sort
+        keys of version ranges rather than the ranges themselves, since they
+        compare much faster.
+        """
+        key = self.variant_sort_keys.get(variant)
+        if key is not None:
+            return key
+
+        if self._request_indices is None:
+            self._request_indices = dict(
+                (x.name, i) for i, x in enumerate(self.solver.request_list)
+                if not x.conflict)
+            self._variant_select_mode = \
+                VariantSelectMode[config.variant_select_mode]
+
+        requested_key = []
+        additional_key = []
+
+        for request in variant.requires_list:
+            range_ = request.range
+            range_key = None if range_ is None else range_.sort_key
+            i = self._request_indices.get(request.name)
+
+            if i is not None:
+                requested_key.append((-i, range_key))
+            elif not request.conflict:
+                additional_key.append((range_key, request.name))
+
+        # in request order
+        requested_key.sort(reverse=True)
+        requested_key = tuple(requested_key)
+        additional_key = tuple(additional_key)
+
+        if self._variant_select_mode == VariantSelectMode.version_priority:
+            key = (requested_key,
+                   -len(additional_key),
+                   additional_key,
+                   variant.index)
+        else:  # VariantSelectMode.intersection_priority
+            key = (len(requested_key),
+                   requested_key,
+                   -len(additional_key),
+                   additional_key,
+                   variant.index)
+
+        self.variant_sort_keys[variant] = key
+        return key
 
     def get_variant_slice(self, package_name, range_):
         """Get a list of variants from the cache.
@@ -992,9 +1383,17 @@ class PackageVariantCache(object):
         variant_list = self.variant_lists.get(package_name)
 
         if variant_list is None:
+            tr = self.solver.tr
+            if tr:
+                t1 = time.time()
+
             variant_list = _PackageVariantList(package_name, self.solver)
             self.variant_lists[package_name] = variant_list
 
+            if tr:
+                tr.count("variant_cache_miss")
+                tr.add_load_time(package_name, time.time() - t1)
+
         entries = variant_list.get_intersection(range_)
         if not entries:
             return None
@@ -1005,11 +1404,123 @@ class PackageVariantCache(object):
         return slice_
 
 
+class _NogoodStore(object):
+    """Store of learned conflicts ('nogoods').
+
+    When a phase fails, the scopes it started with that took part in the
+    failure are recorded, along with the failure reason. Any later phase whose
+    scopes for those same package families are all at least as narrow is then
+    known to fail for the same reason, and can be discarded without solving.
+    Such a phase is graphed from the scopes of the phase that failed, since the
+    failure reason can refer to scopes that only that phase had.
+
+    Nogoods are indexed by the first package family they involve, so that
+    only those that might apply to a phase are checked. Once there are more
+    than `max_size` nogoods, the oldest half are discarded.
+    """
+    max_size = 1000
+
+    def __init__(self):
+        # [(number, items, FailureReason, (scopes, extractions))], see _item
+        self.nogoods = []
+        self.index = {}  # {package_name: [nogood]}
+        self.count = 0
+        self.hits = 0
+
+    def add(self, scopes, fams, failure_reason, failed_scopes, extractions):
+        """Record a failure.
+
+        Args:
+            scopes (list of `_PackageScope`): Scopes of the failed phase, as
+                they were before the phase was solved.
+            fams (set of str): Families that took part in the failure.
+            failure_reason (`FailureReason`): Reason for the failure.
+            failed_scopes (list of `_PackageScope`): Scopes of the failed
+                phase, as they were when it failed.
+            extractions (dict): Extractions of the failed phase.
+        """
+        # only what is needed for matching is kept, not the scopes themselves
+        items = tuple(self._item(x) for x in scopes if x.package_name in fams)
+        if not items:
+            return
+
+        nogood = (self.count, items, failure_reason,
+                  (failed_scopes, extractions))
+        self.count += 1
+        self.nogoods.append(nogood)
+        self.index.setdefault(items[0][0], []).append(nogood)
+
+        if len(self.nogoods) > self.max_size:
+            self.nogoods = self.nogoods[len(self.nogoods) // 2:]
+            self.index = {}
+            for nogood in self.nogoods:
+                self.index.setdefault(nogood[1][0][0], []).append(nogood)
+
+    def find(self, scopes):
+        """Find a known failure that applies to the given scopes.
+
+        Returns:
+            2-tuple of the `FailureReason` of the matching failure, and the
+            (scopes, extractions) of the phase that failed; or None.
+        """
+        if not self.nogoods:
+            return None
+
+        scopes_ = dict((x.package_name, x) for x in scopes)
+        lists = [self.index[x] for x in scopes_ if x in self.index]
+        if not lists:
+            return None
+
+        # check candidates in the order they were found
+        candidates = lists[0] if len(lists) == 1 else heapq.merge(*lists)
+
+        for _, items, failure_reason, graph_source in candidates:
+            for package_name, request, variant_set in items:
+                scope = scopes_.get(package_name)
+                if scope is None or \
+                        not self._is_subset(scope, request, variant_set):
+                    break
+            else:
+                self.hits += 1
+                return failure_reason, graph_source
+
+        return None
+
+    @classmethod
+    def _item(cls, scope):
+        request = scope.package_request
+        if request.conflict:
+            return (scope.package_name, request, None)
+        else:
+            return (scope.package_name, None, scope.variant_slice.variant_set)
+
+    @classmethod
+    def _is_subset(cls, scope, request, variant_set):
+        # True if every solution to 'scope' is also a solution to the nogood
+        # scope, given as a conflict 'request' or a 'variant_set'
+        if request is not None:
+            return (scope.package_request.conflict
+                    and scope.package_request == request)
+        elif scope.package_request.conflict:
+            return False
+
+        slice_ = scope.variant_slice
+        if len(slice_) > len(variant_set):
+            return False
+
+        slice_variant_set = slice_.variant_set
+        return (slice_variant_set is variant_set
+                or slice_variant_set.issubset(variant_set))
+
+
 class _PackageScope(_Common):
     """Contains possible solutions for a package, such as a list of variants,
     or a conflict range. As the resolve progresses, package scopes are narrowed
     down.
     """
+    __slots__ = ("package_name", "solver", "variant_slice", "pr",
+                 "package_request")
+
     def __init__(self, package_request, solver):
         self.package_name = package_request.name
         self.solver = solver
@@ -1209,23 +1720,116 @@ class _ResolvePhase(_Common):
         self.solver = solver
         self.failure_reason = None
         self.extractions = {}
+        self.graph_source = None
         self.status = SolverStatus.pending
 
-        self.scopes = []
-        for package_request in self.solver.request_list:
-            scope = _PackageScope(package_request, solver=solver)
-            self.scopes.append(scope)
+        self.scopes = [_PackageScope(x, solver=solver)
+                       for x in self.solver.request_list]
+
+        indices = range(len(self.scopes))
+        self.dependents = self._index_dependents({}, self.scopes, indices)
 
         self.pending_reducts = set()
-        for i in range(len(self.scopes)):
-            for j in range(len(self.scopes)):
-                if i != j:
-                    self.pending_reducts.add((i, j))
+        for i in indices:
+            for j in self._iter_dependents(self.scopes, self.dependents, i):
+                self.pending_reducts.add((i, j))
 
     @property
     def pr(self):
         return self.solver.pr
 
+    @property
+    def scopes(self):
+        """The package scopes of the phase.
+
+        Phases share scope lists. A phase stores a list of scopes that may be
+        shared with other phases and is never modified, and a dict of the
+        scopes that differ from it. This means that a phase waiting on the
+        solver's stack mostly costs memory proportional to the number of scopes
+        that changed, rather than to the total number of scopes.
+        """
+        if not self._changed_scopes:
+            return self._scopes
+
+        scopes = self._scopes[:]
+        for i, scope in self._changed_scopes.iteritems():
+            scopes[i] = scope
+        return scopes
+
+    @scopes.setter
+    def scopes(self, scopes):
+        self._scopes = scopes
+        self._changed_scopes = None
+
+    def _set_changed_scopes(self, scopes):
+        # Set the scopes of a copy of a phase, sharing the scope list of the
+        # original. A full list is stored instead once enough scopes differ
+        # from the shared list that it becomes the cheaper option (a dict
+        # entry costs several times more than a list item).
+        base = self._scopes
+        if len(scopes) != len(base):
+            self.scopes = scopes
+            return
+
+        changes = {}
+        for i, scope in enumerate(scopes):
+            if scope is not base[i]:
+                changes[i] = scope
+
+        if len(changes) * 8 > len(scopes):
+            self.scopes = scopes
+        else:
+            self._changed_scopes = changes
+
+    @classmethod
+    def _index_dependents(cls, dependents, scopes, indices):
+        """Add scopes to a reverse index of package family to the scopes whose
+        variants reference that family.
+
+        The index is shared between phases, so it is never modified in place -
+        a new index is returned if any scopes were added to it. Scopes only
+        ever narrow, so an index entry may become stale (it lists a scope
+        that no longer references the family), but never incomplete.
+
+        Args:
+            dependents (dict): Index to add to, {family: frozenset(index)}.
+            scopes (list of `_PackageScope`): Scopes of the phase.
+            indices (list of int): Indices of the scopes to add.
+
+        Returns:
+            dict: The updated index.
+        """
+        added = {}
+        for j in indices:
+            slice_ = scopes[j].variant_slice
+            if slice_ is not None:
+                for fam in slice_.fam_requires:
+                    added.setdefault(fam, []).append(j)
+
+        if not added:
+            return dependents
+
+        dependents = dependents.copy()
+        for fam, indices_ in added.iteritems():
+            dependents[fam] = dependents.get(fam, frozenset()).union(indices_)
+        return dependents
+
+    def _iter_dependents(self, scopes, dependents, i):
+        """Iterate over the indices of scopes that may be reduced by scope i.
+
+        A scope can only be reduced by a package request if some of its
+        variants reference the request's family. When the solver is not
+        optimised, every other scope is returned regardless.
+        """
+        if self.solver.optimised:
+            indices = dependents.get(scopes[i].package_name, ())
+        else:
+            indices = xrange(len(scopes))
+
+        for j in indices:
+            if j != i:
+                yield j
+
     def solve(self):
         """Attempt to solve the phase."""
         if self.status != SolverStatus.pending:
@@ -1235,12 +1839,36 @@ class _ResolvePhase(_Common):
         failure_reason = None
         extractions = {}
         pending_reducts = self.pending_reducts.copy()
+        dependents = self.dependents
+        involved_fams = set()
+        nogoods = self.solver.nogoods if self.solver.optimised else None
+        tr = self.solver.tr
+        stage = [None, None]  # (current stage, start time) when tracing
+
+        def _stage(name):
+            t = time.time()
+            if stage[0]:
+                tr.add_time(stage[0], t - stage[1])
+            stage[0] = name
+            stage[1] = t
+
+        def _reduce_by_requires(j):
+            # schedule reduction of scope j by the scopes of the families that
+            # its variants reference
+            fams = scopes[j].variant_slice.fam_requires
+            for i, scope in enumerate(scopes):
+                if i != j and scope.package_name in fams:
+                    pending_reducts.add((i, j))
 
         def _create_phase(status=None):
+            if tr:
+                _stage(None)
+
             phase = copy.copy(self)
-            phase.scopes = scopes
+            phase._set_changed_scopes(scopes)
             phase.failure_reason = failure_reason
             phase.extractions = extractions
+            phase.dependents = dependents
             phase.pending_reducts = set()
 
             if status is None:
@@ -1248,19 +1876,44 @@ class _ResolvePhase(_Common):
                                 else SolverStatus.exhausted)
             else:
                 phase.status = status
+                if status == SolverStatus.failed and nogoods is not None:
+                    nogoods.add(self.scopes, involved_fams, failure_reason,
+                                scopes, extractions)
             return phase
 
+        # check if this phase contains a conflict already found in another phase
+        if nogoods is not None:
+            nogood = nogoods.find(scopes)
+            if nogood is not None:
+                failure_reason, graph_source = nogood
+                if tr:
+                    tr.count("nogood_hit")
+                if self.pr:
+                    self.pr("phase contains a known conflict (%d hits so far): %s",
+                            nogoods.hits, failure_reason)
+                nogoods = None  # nothing new learned
+                phase = _create_phase(SolverStatus.failed)
+                # the failure reason refers to the scopes of the phase that
+                # failed, which this phase may not have
+                phase.graph_source = graph_source
+                return phase
+
         while True:
             # iteratively extract until no more extractions possible
             while True:
                 self.pr.subheader("EXTRACTING:")
                 common_requests = []
+                if tr:
+                    _stage("extract")
 
                 for i in range(len(scopes)):
                     while True:
                         scope_, common_request = scopes[i].extract()
                         if common_request:
                             common_requests.append(common_request)
+                            involved_fams.add(scopes[i].package_name)
+                            if tr:
+                                tr.count("extract")
                             k = (scopes[i].package_name, common_request.name)
                             extractions[k] = common_request
                             scopes[i] = scope_
@@ -1282,12 +1935,18 @@ class _ResolvePhase(_Common):
                     # do intersections with existing scopes
                     self.pr.subheader("INTERSECTING:")
                     req_fams = []
+                    if tr:
+                        _stage("intersect")
 
                     for i, scope in enumerate(scopes):
                         req = request_list.get(scope.package_name)
                         if req is not None:
                             scope_ = scope.intersect(req.range)
                             req_fams.append(req.name)
+                            if scope_ is not scope:
+                                involved_fams.add(req.name)
+                            if tr:
+                                tr.count("intersect")
 
                             if scope_ is None:
                                 conflict = DependencyConflict(
@@ -1296,9 +1955,15 @@ class _ResolvePhase(_Common):
                                 return _create_phase(SolverStatus.failed)
                             elif scope_ is not scope:
                                 scopes[i] = scope_
-                                for j in range(len(scopes)):
-                                    if j != i:
-                                        pending_reducts.add((i, j))
+                                if scope.variant_slice is None:
+                                    # a conflict scope now has variants
+                                    dependents = self._index_dependents(
+                                        dependents, scopes, [i])
+                                    _reduce_by_requires(i)
+
+                                for j in self._iter_dependents(
+                                        scopes, dependents, i):
+                                    pending_reducts.add((i, j))
 
                     # add new scopes
                     new_reqs = [x for x in request_list.requirements
@@ -1307,6 +1972,9 @@ class _ResolvePhase(_Common):
                     if new_reqs:
                         self.pr.subheader("ADDING:")
                         n = len(scopes)
+                        if tr:
+                            _stage("add")
+                            tr.count("add", len(new_reqs))
 
                         for req in new_reqs:
                             scope = _PackageScope(req, solver=self.solver)
@@ -1314,15 +1982,19 @@ class _ResolvePhase(_Common):
                             if self.pr:
                                 self.pr("added %s", scope)
 
-                        m = len(new_reqs)
-                        for i in range(n, n + m):
-                            for j in range(n + m):
-                                if i != j:
-                                    pending_reducts.add((i, j))
+                        new_indices = range(n, len(scopes))
+                        dependents = self._index_dependents(
+                            dependents, scopes, new_indices)
 
-                        for i in range(n):
-                            for j in range(n, n + m):
+                        # reduce dependent scopes by the new scopes, and the
+                        # new scopes by the scopes they depend on
+                        for i in new_indices:
+                            for j in self._iter_dependents(
+                                    scopes, dependents, i):
                                 pending_reducts.add((i, j))
+
+                        for j in new_indices:
+                            _reduce_by_requires(j)
                 else:
                     break
 
@@ -1331,6 +2003,8 @@ class _ResolvePhase(_Common):
 
             # iteratively reduce until no more reductions possible
             self.pr.subheader("REDUCING:")
+            if tr:
+                _stage("reduce")
 
             if not self.solver.optimised:
                 # check all variants for reduction regardless
@@ -1348,15 +2022,20 @@ class _ResolvePhase(_Common):
                 for i, j in sorted(pending_reducts):
                     new_scope, reductions = scopes[j].reduce_by(
                         scopes[i].package_request)
+                    if new_scope is not scopes[j]:
+                        involved_fams.add(scopes[i].package_name)
+                        involved_fams.add(scopes[j].package_name)
+                    if tr:
+                        tr.count("reduce")
+                        tr.count("reduction", len(reductions))
 
                     if new_scope is None:
                         failure_reason = TotalReduction(reductions)
                         return _create_phase(SolverStatus.failed)
                     elif new_scope is not scopes[j]:
                         scopes[j] = new_scope
-                        for i in range(len(scopes)):
-                            if i != j:
-                                new_pending_reducts.add((j, i))
+                        for k in self._iter_dependents(scopes, dependents, j):
+                            new_pending_reducts.add((j, k))
 
                 pending_reducts = new_pending_reducts
 
@@ -1428,33 +2107,31 @@ class _ResolvePhase(_Common):
         """
         assert(self.status == SolverStatus.exhausted)
 
-        scopes = []
-        next_scopes = []
+        scopes = self.scopes
         split = None
 
-        for i, scope in enumerate(self.scopes):
-            if split is None:
-                r = scope.split()
-                if r is not None:
-                    scope_, next_scope = r
-                    scopes.append(scope_)
-                    next_scopes.append(next_scope)
-                    split = i
-                    continue
-
-            scopes.append(scope)
-            next_scopes.append(scope)
+        for i, scope in enumerate(scopes):
+            r = scope.split()
+            if r is not None:
+                scope_, next_scope = r
+                split = i
+                break
 
         phase = copy.copy(self)
-        phase.scopes = scopes
         phase.status = SolverStatus.pending
 
-        for i in range(len(phase.scopes)):
-            if i != split:
-                phase.pending_reducts.add((split, i))
+        for j in self._iter_dependents(scopes, self.dependents, split):
+            phase.pending_reducts.add((split, j))
 
         next_phase = copy.copy(phase)
-        next_phase.scopes = next_scopes
+
+        phase_scopes = scopes[:]
+        phase_scopes[split] = scope_
+        phase._set_changed_scopes(phase_scopes)
+
+        next_scopes = scopes[:]
+        next_scopes[split] = next_scope
+        next_phase._set_changed_scopes(next_scopes)
         return (phase, next_phase)
 
     def get_graph(self):
@@ -1467,231 +2144,29 @@ class _ResolvePhase(_Common):
         Returns:
             A pygraph.digraph object.
         """
-        g = digraph()
-        scopes = dict((x.package_name, x) for x in self.scopes)
-        failure_nodes = set()
-        request_nodes = {}  # (request, node_id)
-        scope_nodes = {}  # (package_name, node_id)
-
-        # -- graph creation basics
-
-        node_color = "#F6F6F6"
-        request_color = "#FFFFAA"
-        solved_color = "#AAFFAA"
-        node_fontsize = 10
-        counter = [1]
-
-        def _uid():
-            id_ = counter[0]
-            counter[0] += 1
-            return "_%d" % id_
-
-        def _add_edge(id1, id2, arrowsize=0.5):
-            e = (id1, id2)
-            if g.has_edge(e):
-                g.del_edge(e)
-            g.add_edge(e)
-            g.add_edge_attribute(e, ("arrowsize", str(arrowsize)))
-            return e
-
-        def _add_extraction_merge_edge(id1, id2):
-            e = _add_edge(id1, id2, 1)
-            g.add_edge_attribute(e, ("arrowhead", "odot"))
-
-        def _add_conflict_edge(id1, id2):
-            e = _add_edge(id1, id2, 1)
-            g.set_edge_label(e, "CONFLICT")
-            g.add_edge_attribute(e, ("style", "bold"))
-            g.add_edge_attribute(e, ("color", "red"))
-            g.add_edge_attribute(e, ("fontcolor", "red"))
-
-        def _add_cycle_edge(id1, id2):
-            e = _add_edge(id1, id2, 1)
-            g.set_edge_label(e, "CYCLE")
-            g.add_edge_attribute(e, ("style", "bold"))
-            g.add_edge_attribute(e, ("color", "red"))
-            g.add_edge_attribute(e, ("fontcolor", "red"))
-
-        def _add_reduct_edge(id1, id2, label):
-            e = _add_edge(id1, id2, 1)
-            g.set_edge_label(e, label)
-            g.add_edge_attribute(e, ("fontsize", node_fontsize))
-
-        def _add_node(label, color, style):
-            attrs = [("label", label),
-                     ("fontsize", node_fontsize),
-                     ("fillcolor", color),
-                     ("style", '"%s"' % style)]
-            id_ = _uid()
-            g.add_node(id_, attrs=attrs)
-            return id_
+        return self.get_graph_func()()
 
-        def _add_request_node(request, initial_request=False):
-            id_ = request_nodes.get(request)
-            if id_ is not None:
-                return id_
+    def get_graph_func(self):
+        """Get a function that generates the resolve graph, see `get_graph`.
 
-            label = str(request)
-            if initial_request:
-                color = request_color
-            else:
-                color = node_color
-
-            id_ = _add_node(label, color, "filled,dashed")
-            request_nodes[request] = id_
-            return id_
+        The function holds on to a snapshot of the data that the graph is
+        generated from, rather than to this phase and its solver, so it is
+        cheap to keep after the solve.
 
-        def _add_scope_node(scope):
-            id_ = scope_nodes.get(scope.package_name)
-            if id_ is not None:
-                return id_
-
-            variant = scope._get_solved_variant()
-            if variant:
-                label = str(variant)
-                color = solved_color
-                style = "filled"
-            elif scope.is_conflict:
-                label = str(scope)
-                color = node_color
-                style = "filled,dashed"
-            else:
-                label = str(scope)
-                color = node_color
-                style = "filled"
-
-            id_ = _add_node(label, color, style)
-            scope_nodes[scope.package_name] = id_
-            return id_
-
-        def _add_reduct_node(request):
-            return _add_node(str(request), node_color, "filled,dashed")
-
-        # -- generate the graph
-
-        # create initial request nodes
-        for request in self.solver.request_list:
-            _add_request_node(request, True)
-
-        # create scope nodes
-        for scope in self.scopes:
-            if scope.is_conflict:
-                id1 = request_nodes.get(scope.package_request)
-                if id1 is not None:
-                    # special case - a scope that matches an initial conflict request,
-                    # we switch nodes so the request node becomes a scope node
-                    scope_nodes[scope.package_name] = id1
-                    del request_nodes[scope.package_request]
-                    continue
-
-            _add_scope_node(scope)
-
-        # create (initial request -> scope) edges
-        for request in self.solver.request_list:
-            id1 = request_nodes.get(request)
-            if id1 is not None:
-                id2 = scope_nodes.get(request.name)
-                if id2 is not None:
-                    _add_edge(id1, id2)
-
-        # for solved scopes, create (scope -> requirement) edge
-        for scope in self.scopes:
-            variant = scope._get_solved_variant()
-            if variant:
-                id1 = scope_nodes[scope.package_name]
-
-                for request in variant.requires_list.requirements:
-                    id2 = _add_request_node(request)
-                    _add_edge(id1, id2)
-
-        # add extractions
-        for (src_fam, _), dest_req in self.extractions.iteritems():
-            id1 = scope_nodes.get(src_fam)
-            if id1 is not None:
-                id2 = _add_request_node(dest_req)
-                _add_edge(id1, id2)
-
-        # add extraction intersections
-        extracted_fams = set(x[1] for x in self.extractions.iterkeys())
-        for fam in extracted_fams:
-            requests = [v for k, v in self.extractions.iteritems() if k[1] == fam]
-            if len(requests) > 1:
-                reqlist = RequirementList(requests)
-                if not reqlist.conflict:
-                    merged_request = reqlist.get(fam)
-                    for request in requests:
-                        if merged_request != request:
-                            id1 = _add_request_node(request)
-                            id2 = _add_request_node(merged_request)
-                            _add_extraction_merge_edge(id1, id2)
-
-        # add conflicts
-        fr = self.failure_reason
-        if fr:
-            if isinstance(fr, DependencyConflicts):
-                for conflict in fr.conflicts:
-                    id1 = _add_request_node(conflict.dependency)
-                    id2 = scope_nodes.get(conflict.conflicting_request.name)
-                    if id2 is None:
-                        id2 = _add_request_node(conflict.conflicting_request)
-                    _add_conflict_edge(id1, id2)
-
-                    failure_nodes.add(id1)
-                    failure_nodes.add(id2)
-            elif isinstance(fr, TotalReduction):
-                if len(fr.reductions) == 1:
-                    # special case - singular total reduction
-                    reduct = fr.reductions[0]
-                    id1 = scope_nodes[reduct.name]
-                    id2 = _add_request_node(reduct.dependency)
-                    id3 = scope_nodes[reduct.conflicting_request.name]
-                    _add_edge(id1, id2)
-                    _add_conflict_edge(id2, id3)
-
-                    failure_nodes.add(id1)
-                    failure_nodes.add(id2)
-                    failure_nodes.add(id3)
-                else:
-                    for reduct in fr.reductions:
-                        id1 = scope_nodes[reduct.name]
-                        id2 = _add_reduct_node(reduct.dependency)
-                        id3 = scope_nodes[reduct.conflicting_request.name]
-                        _add_reduct_edge(id1, id2, reduct.reducee_str())
-                        _add_conflict_edge(id2, id3)
-
-                        failure_nodes.add(id1)
-                        failure_nodes.add(id2)
-                        failure_nodes.add(id3)
-            elif isinstance(fr, Cycle):
-                for i, pkg in enumerate(fr.packages):
-                    id1 = scope_nodes[pkg.name]
-                    failure_nodes.add(id1)
-                    pkg2 = fr.packages[(i + 1) % len(fr.packages)]
-                    id2 = scope_nodes[pkg2.name]
-                    _add_cycle_edge(id1, id2)
-
-        # connect leaf-node requests to a matching scope, if any
-        for request, id1 in request_nodes.iteritems():
-            if not g.neighbors(id1):  # leaf node
-                id2 = scope_nodes.get(request.name)
-                if id2 is not None:
-                    scope = scopes.get(request.name)
-                    if not request.conflicts_with(scope.package_request):
-                        _add_edge(id1, id2)
-
-        # prune nodes not related to failure
-        if self.solver.prune_unfailed and failure_nodes:
-            access_dict = accessibility(g)
-            del_nodes = set()
-
-            for n, access_nodes in access_dict.iteritems():
-                if not (set(access_nodes) & failure_nodes):
-                    del_nodes.add(n)
-
-            for n in del_nodes:
-                g.del_node(n)
+        Returns:
+            Callable that takes no arguments, and returns a pygraph.digraph.
+        """
+        if self.graph_source:
+            scopes, extractions = self.graph_source
+        else:
+            scopes, extractions = self.scopes, self.extractions
 
-        return g
+        return functools.partial(_get_graph,
+                                 request_list=list(self.solver.request_list),
+                                 phase_scopes=map(_GraphScope, scopes),
+                                 extractions=dict(extractions),
+                                 failure_reason=self.failure_reason,
+                                 prune_unfailed=self.solver.prune_unfailed)
 
     def _get_minimal_graph(self):
         if not self._is_solved():
@@ -1749,10 +2224,16 @@ class Solver(_Common):
     """
     max_verbosity = 3
 
+    # seconds between checks of callbacks and budgets, while waiting on the
+    # result of a speculative child process
+    speculation_poll_interval = 0.1
+
     def __init__(self, package_requests, package_paths, package_filter=None,
                  package_orderers=None, callback=None, building=False,
                  optimised=True, verbosity=0, buf=None, package_load_callback=None,
-                 prune_unfailed=True):
+                 prune_unfailed=True, speculative_workers=None, trace=None,
+                 time_limit=None, solve_limit=None, memory_limit=None,
+                 prefetch_threads=None, budget_start=None):
         """Create a Solver.
 
         Args:
@@ -1774,10 +2255,50 @@ class Solver(_Common):
                 continue on with the solve.
             package_load_callback: If not None, this callable will be called
                 prior to each package being loaded. It is passed a single
-                `Package` object.
+                `Package` object. Note that packages already loaded by another
+                solver in this process are taken from the shared variant cache
+                (see `variant_caching_maxsize` config setting) and do not
+                trigger this callback.
             prune_unfailed (bool): If the solve failed, and `prune_unfailed` is
                 True, any packages unrelated to the conflict are removed from
                 the graph.
+            speculative_workers (int): Maximum number of child processes used
+                to speculatively solve the alternative phase of each split,
+                while this process carries on with the preferred phase. Zero
+                disables speculation. If None, defaults to
+                `config.speculative_solve_workers`. The result of the solve is
+                identical either way. `num_solves` and `num_fails` include the
+                steps taken by child processes, however `failed_phase_list`
+                only contains the failed phases solved in this process.
+            trace (bool): If True, gather a structured trace of the solve,
+                see `get_trace`. If None, defaults to `config.solver_trace`.
+            time_limit (int): Abort the solve if it takes longer than this
+                many seconds. If -1, there is no time limit. If None, defaults
+                to `config.resolve_time_limit`.
+            solve_limit (int): Abort the solve once this many solve steps
+                have been executed. If -1, there is no limit. If None, defaults
+                to `config.resolve_solve_limit`.
+            memory_limit (int): Abort the solve if the peak memory of the
+                process grows by more than this many megabytes during the
+                solve. If -1, there is no limit. If None, defaults to
+                `config.resolve_memory_limit`. Ignored on platforms that do
+                not provide the `resource` module.
+            budget_start (tuple): Budget state of a previous solve that this
+                solve continues, see `get_budget_state`. If provided, budgets
+                apply to both solves as a whole, rather than to this solve
+                alone.
+            prefetch_threads (int): Maximum number of threads used to load
+                package families in the background, as soon as they are
+                required by a variant in the solve. Zero disables prefetching,
+                as does speculation (see `speculative_workers`), since child
+                processes are forked. If None, defaults to
+                `config.solver_prefetch_threads`.
+
+        Budgets (`time_limit`, `solve_limit`, `memory_limit`) are only
+        enforced by `solve`. When one is exceeded, the solve stops in the
+        unsolved state, and `abort_reason` describes the limit that was hit,
+        the deepest phase reached, and the package families most often
+        involved in failed phases.
         """
         self.package_paths = package_paths
         self.package_filter = package_filter
@@ -1789,16 +2310,47 @@ class Solver(_Common):
         self.package_load_callback = package_load_callback
         self.building = building
         self.request_list = None
+        self.trace = config.solver_trace if trace is None else trace
+
+        maxsize = config.version_caching_maxsize
+        set_cache_size(None if maxsize < 0 else maxsize)
+
+        self.time_limit = (config.resolve_time_limit if time_limit is None
+                           else time_limit)
+        self.solve_limit = (config.resolve_solve_limit if solve_limit is None
+                            else solve_limit)
+        self.memory_limit = (config.resolve_memory_limit if memory_limit is None
+                             else memory_limit)
+        if resource is None:
+            self.memory_limit = -1
+
+        if speculative_workers is None:
+            speculative_workers = config.speculative_solve_workers
+        if not hasattr(os, "fork"):
+            speculative_workers = 0
+        self.speculative_workers = speculative_workers
+        self.speculations = {}  # {id(phase): (phase, process, connection)}
+        self.budget_start = budget_start  # (start time, start rss, steps)
+        self._budget_start = None  # self.budget_start, while solving
+
+        if prefetch_threads is None:
+            prefetch_threads = config.solver_prefetch_threads
+        if speculative_workers:
+            prefetch_threads = 0
+        self.prefetch_threads = prefetch_threads
 
         self.non_conflict_package_requests = [x for x in package_requests
                                               if not x.conflict]
 
         self.phase_stack = None
         self.failed_phase_list = None
+        self.nogoods = None
+        self.tr = None
         self.abort_reason = None
         self.callback_return = None
         self.solve_count = None
         self.depth_counts = None
+        self.deepest_phase = None
         self.solve_time = None
         self.load_time = None
         self.solve_begun = None
@@ -1863,15 +2415,33 @@ class Solver(_Common):
         """Return the number of solve steps that have been executed."""
         return self.solve_count
 
+    def get_budget_state(self):
+        """Get the state of the budgets, for a subsequent solve to continue.
+
+        Returns:
+            tuple: Value for the `budget_start` argument of another `Solver`,
+            or None if this solve has not started.
+        """
+        if self.budget_start is None:
+            return None
+        start_time, start_rss, start_steps = self.budget_start
+        return (start_time, start_rss, start_steps + self.solve_count)
+
     @property
     def num_fails(self):
         """Return the number of failed solve steps that have been executed.
         Note that num_solves is inclusive of failures."""
-        n = len(self.failed_phase_list)
+        n = len(self.failed_phase_list) + self.speculated_fails
         if self.phase_stack[-1].status in (SolverStatus.failed, SolverStatus.cyclic):
             n += 1
         return n
 
+    @property
+    def num_nogood_hits(self):
+        """Return the number of phases that failed due to a conflict already
+        found in an earlier phase, and so did not need to be solved."""
+        return self.nogoods.hits
+
     @property
     def cyclic_fail(self):
         """Return True if the solve failed due to a cycle, False otherwise."""
@@ -1905,22 +2475,38 @@ class Solver(_Common):
 
         t1 = time.time()
         pt1 = package_repo_stats.package_load_time
+        rss1 = _peak_rss() if self.memory_limit != -1 else None
+        if self.budget_start is None:
+            self.budget_start = (t1, rss1, 0)
+        self._budget_start = self.budget_start
 
         # iteratively solve phases
-        while self.status == SolverStatus.unsolved:
-            self.solve_step()
-            if self.status == SolverStatus.unsolved and not self._do_callback():
-                break
+        try:
+            while self.status == SolverStatus.unsolved:
+                if not self.solve_step():
+                    break  # stopped while waiting on a speculation
+                if self.status == SolverStatus.unsolved and \
+                        not self._keep_going():
+                    break
+        finally:
+            self._budget_start = None
+            self._stop_speculations()
+            self.package_cache.stop_prefetching()
 
         self.load_time = package_repo_stats.package_load_time - pt1
         self.solve_time = time.time() - t1
 
     def solve_step(self):
         """Perform a single solve step.
+
+        Returns:
+            bool: False if the step was not taken, because a callback or
+            budget stopped the solve while waiting on a speculative child
+            process (see `speculative_workers`), True otherwise.
         """
         self.solve_begun = True
         if self.status != SolverStatus.unsolved:
-            return
+            return True
 
         if self.pr:
             self.pr.header("SOLVE #%d...", self.solve_count + 1)
@@ -1931,15 +2517,34 @@ class Solver(_Common):
             self.failed_phase_list.append(phase)
             phase = self._pop_phase()
 
-        if phase.status == SolverStatus.exhausted:
-            self.pr.subheader("SPLITTING:")
-            phase, next_phase = phase.split()
-            self._push_phase(next_phase)
-            if self.pr:
-                self.pr("new phase: %s", phase)
+        speculation = self._get_speculation_result(phase)
+
+        if speculation is False:
+            self._push_phase(phase)
+            return False
+        elif speculation is not None:
+            # the subtree under this phase has already been explored by a
+            # speculative child process, just follow its result
+            new_phase = self._follow_path(phase, *speculation[1:])
+        else:
+            if phase.status == SolverStatus.exhausted:
+                self.pr.subheader("SPLITTING:")
+                if self.tr:
+                    t1 = time.time()
+
+                phase, next_phase = phase.split()
+
+                if self.tr:
+                    self.tr.count("split")
+                    self.tr.add_time("split", time.time() - t1)
+                self._push_phase(next_phase)
+                self._speculate(next_phase)
+                if self.pr:
+                    self.pr("new phase: %s", phase)
+
+            new_phase = phase.solve()
+            self.solve_count += 1
 
-        new_phase = phase.solve()
-        self.solve_count += 1
         self.pr.subheader("RESULT:")
 
         if new_phase.status == SolverStatus.failed:
@@ -1947,6 +2552,7 @@ class Solver(_Common):
             self._push_phase(new_phase)
             if self.pr and len(self.phase_stack) == 1:
                 self.pr.header("FAIL: there is no solution")
+                self.pr("known conflict hits: %d", self.num_nogood_hits)
         elif new_phase.status == SolverStatus.solved:
             # solved, but there may be cyclic dependencies
             final_phase = new_phase.finalise()
@@ -1959,6 +2565,7 @@ class Solver(_Common):
                     self.pr.header("SUCCESS")
                     self.pr("solve time: %.2f seconds", self.solve_time)
                     self.pr("load time: %.2f seconds", self.load_time)
+                    self.pr("known conflict hits: %d", self.num_nogood_hits)
         else:
             assert(new_phase.status == SolverStatus.exhausted)
             self._push_phase(new_phase)
@@ -1966,6 +2573,39 @@ class Solver(_Common):
                 s = SolverState(self.num_solves, self.num_fails, new_phase)
                 self.pr.important(str(s))
 
+        if self.tr:
+            self.tr.event("step",
+                          solve=self.solve_count,
+                          depth=len(self.phase_stack),
+                          status=new_phase.status.name,
+                          phase=str(new_phase))
+        return True
+
+    def get_trace(self):
+        """Get the structured trace of the solve.
+
+        The trace is a list of records, one per solve step, followed by a
+        summary containing counts and timings of each solver operation,
+        package load times per family, and the (process wide) statistics of
+        the version caches.
+
+        Returns:
+            List of dicts, or None if tracing is not enabled.
+        """
+        if not self.tr:
+            return None
+
+        records = self.tr.get_records()
+        records[-1].update(status=self.status.name,
+                           num_solves=self.num_solves,
+                           num_fails=self.num_fails,
+                           num_nogood_hits=self.num_nogood_hits,
+                           solve_time=self.solve_time,
+                           load_time=self.load_time,
+                           abort_reason=self.abort_reason,
+                           version_caches=get_cache_stats())
+        return records
+
     def failure_reason(self, failure_index=None):
         """Get the reason for a failure.
 
@@ -2020,12 +2660,24 @@ class Solver(_Common):
         Returns:
             A pygraph.digraph object.
         """
+        return self.get_graph_func()()
+
+    def get_graph_func(self):
+        """Get a function that generates the most recent solve graph.
+
+        The function does not keep this solver alive, so it can be held on to
+        cheaply, and the graph generated later only if it is needed. See
+        `get_graph`.
+
+        Returns:
+            Callable that takes no arguments, and returns a pygraph.digraph.
+        """
         st = self.status
         if st in (SolverStatus.solved, SolverStatus.unsolved):
             phase = self._latest_nonfailed_phase()
-            return phase.get_graph()
         else:
-            return self.get_fail_graph()
+            phase, _ = self._get_failed_phase()
+        return phase.get_graph_func()
 
     def get_fail_graph(self, failure_index=None):
         """Returns a graph showing a solve failure.
@@ -2064,8 +2716,12 @@ class Solver(_Common):
     def _init(self):
         self.phase_stack = []
         self.failed_phase_list = []
+        self.nogoods = _NogoodStore()
+        self.tr = _Tracer(self.trace)
         self.solve_count = 0
+        self.speculated_fails = 0
         self.depth_counts = {}
+        self.deepest_phase = None
         self.solve_time = 0.0
         self.load_time = 0.0
         self.solve_begun = False
@@ -2099,6 +2755,162 @@ class Solver(_Common):
 
         return keep_going
 
+    def _keep_going(self):
+        return self._do_callback() and self._check_budget(*self._budget_start)
+
+    def _check_budget(self, start_time, start_rss, start_steps):
+        # returns False, and sets the abort reason, if a budget is exceeded
+        reason = None
+        if self.solve_limit != -1 and \
+                start_steps + self.solve_count >= self.solve_limit:
+            reason = "solve limit of %d steps reached" % self.solve_limit
+        elif self.time_limit != -1 and \
+                time.time() - start_time > self.time_limit:
+            reason = "time limit of %d seconds exceeded" % self.time_limit
+        elif self.memory_limit != -1:
+            mb = (_peak_rss() - start_rss) / (1024.0 * 1024.0)
+            if mb > self.memory_limit:
+                reason = ("memory limit of %d MB exceeded (grew by %.1f MB)"
+                          % (self.memory_limit, mb))
+
+        if reason is None:
+            return True
+
+        lines = ["solve budget exceeded: %s, after %d solves (%d failed)"
+                 % (reason, self.num_solves, self.num_fails)]
+
+        depth = max(self.depth_counts)
+        lines.append("deepest phase reached %s: %s"
+                     % (self._depth_label(depth), self.deepest_phase))
+
+        counts = sorted(self.conflict_counts().iteritems(),
+                        key=lambda x: (-x[1], x[0]))[:5]
+        if counts:
+            s = ", ".join("%s (%d)" % x for x in counts)
+            lines.append("most frequent conflicts: %s" % s)
+
+        self.abort_reason = '\n'.join(lines)
+        self.pr("solve aborted: %s", self.abort_reason)
+        return False
+
+    def conflict_counts(self):
+        """Count how often each package family was involved in a failure.
+
+        Returns:
+            dict: Number of failed phases that each package family was
+            involved in, keyed by family name.
+        """
+        fails = self.failed_phase_list
+        if self.phase_stack[-1].status in (SolverStatus.failed, SolverStatus.cyclic):
+            fails = fails + self.phase_stack[-1:]
+
+        counts = {}
+        for phase in fails:
+            fr = phase.failure_reason
+            if fr:
+                for name in set(x.name for x in fr.involved_requirements()):
+                    counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def _speculate(self, phase):
+        """Start solving the subtree under `phase` in a child process.
+
+        The child is forked, so it shares the current solve state without
+        needing to serialize it. It sends back the branch path to the first
+        solved phase in the subtree (in the same order a serial solve would
+        visit them), or None if the entire subtree fails, along with the
+        number of phases it solved and the number of those that failed.
+        """
+        if not self.speculative_workers:
+            return
+
+        running = sum(1 for _, proc, _ in self.speculations.itervalues()
+                      if proc.is_alive())
+        if running >= self.speculative_workers:
+            return
+
+        from multiprocessing import Process, Pipe
+
+        reader, writer = Pipe(duplex=False)
+        proc = Process(target=_speculative_solve, args=(self, phase, writer))
+        proc.daemon = True
+        proc.start()
+        writer.close()
+
+        self.speculations[id(phase)] = (phase, proc, reader)
+        if self.pr:
+            self.pr("speculating on phase: %s", phase)
+
+    def _get_speculation_result(self, phase):
+        # returns a (solved, path, num_solves, num_fails) tuple, None if there
+        # is no usable speculation for this phase, or False if a callback or
+        # budget stopped the solve while waiting for the result
+        entry = self.speculations.pop(id(phase), None)
+        if entry is None or entry[0] is not phase:
+            return None
+
+        _, proc, reader = entry
+        try:
+            while not reader.poll(self.speculation_poll_interval):
+                if self._budget_start and not self._keep_going():
+                    proc.terminate()
+                    return False
+            result = reader.recv()
+        except (EOFError, IOError):
+            result = None
+        finally:
+            reader.close()
+            proc.join()
+
+        if not isinstance(result, tuple):
+            if self.pr:
+                self.pr("speculation failed, continuing serially: %s", result)
+            return None
+
+        if self.pr:
+            outcome = "solution found" if result[0] else "no solution"
+            self.pr("speculation result (%s) for phase: %s", outcome, phase)
+        return result
+
+    def _follow_path(self, phase, path, num_solves, num_fails):
+        """Solve phases along a known branch path.
+
+        Alternative phases that a serial solve would have left on the stack
+        are pushed, so the solver state matches a serial solve. A path of None
+        means the subtree is known to fail - the last (rightmost) branch is
+        followed, since that is where a serial solve would have failed last.
+
+        The solve and fail counts are updated with the phases the speculative
+        child process solved, but that are not solved again here.
+        """
+        path = list(path) if path is not None else None
+
+        while True:
+            new_phase = phase.solve()
+            num_solves -= 1
+            if new_phase.status != SolverStatus.exhausted:
+                if new_phase.status == SolverStatus.failed:
+                    num_fails -= 1
+                self.solve_count += 1 + max(num_solves, 0)
+                self.speculated_fails += max(num_fails, 0)
+                return new_phase
+
+            self.solve_count += 1
+
+            phase, next_phase = new_phase.split()
+            if path is None or path.pop(0):
+                phase = next_phase
+            else:
+                self._push_phase(next_phase)
+
+    def _stop_speculations(self):
+        for _, proc, reader in self.speculations.itervalues():
+            reader.close()
+            if proc.is_alive():
+                proc.terminate()
+            proc.join()
+        self.speculations = {}
+
     def _get_variant_slice(self, package_name, range_):
         slice_ = self.package_cache.get_variant_slice(
             package_name=package_name, range_=range_)
@@ -2111,6 +2923,12 @@ class Solver(_Common):
         self.depth_counts[depth] = count
         self.phase_stack.append(phase)
 
+        if depth == len(self.depth_counts) - 1:
+            self.deepest_phase = phase
+
+        if self.tr and depth >= self.tr.max_depth:
+            self.tr.max_depth = depth + 1
+
         if self.pr:
             dlabel = self._depth_label()
             self.pr("pushed %s: %s", dlabel, phase)
@@ -2162,6 +2980,295 @@ class Solver(_Common):
                              str(self.phase_stack[-1]))
 
 
+def _peak_rss():
+    """Get the peak resident memory of this process, in bytes."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # reported in bytes on osx, but in kilobytes elsewhere
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _speculative_solve(solver, phase, conn):
+    """Entry point of a speculative child process. See `Solver._speculate`."""
+    from rez.utils.memcached import scoped_instance_manager
+
+    # don't share the parent's memcached sockets or output
+    scoped_instance_manager.clients = {}
+    solver.pr.verbosity = 0
+    solver.package_load_callback = None
+    solver.speculative_workers = 0
+
+    try:
+        solved, result_path = False, None
+        num_solves = num_fails = 0
+        stack = [(phase, [])]
+
+        while stack:
+            phase, path = stack.pop()
+            new_phase = phase.solve()
+            num_solves += 1
+
+            if new_phase.status == SolverStatus.solved:
+                solved, result_path = True, path
+                break
+            elif new_phase.status == SolverStatus.failed:
+                num_fails += 1
+            elif new_phase.status == SolverStatus.exhausted:
+                phase_, next_phase = new_phase.split()
+                stack.append((next_phase, path + [1]))
+                stack.append((phase_, path + [0]))
+
+        result = (solved, result_path, num_solves, num_fails)
+    except Exception as e:
+        result = "%s: %s" % (e.__class__.__name__, str(e))
+
+    conn.send(result)
+    conn.close()
+
+
+class _GraphScope(object):
+    """The parts of a `_PackageScope` that the resolve graph shows."""
+    __slots__ = ("package_name", "package_request", "is_conflict", "variant",
+                 "label")
+
+    def __init__(self, scope):
+        self.package_name = scope.package_name
+        self.package_request = scope.package_request
+        self.is_conflict = scope.is_conflict
+        self.variant = scope._get_solved_variant()
+        self.label = None if self.variant else str(scope)
+
+
+def _get_graph(request_list, phase_scopes, extractions, failure_reason,
+               prune_unfailed):
+    """Generate the resolve graph of a phase, see `_ResolvePhase.get_graph`."""
+    g = digraph()
+    scopes = dict((x.package_name, x) for x in phase_scopes)
+    failure_nodes = set()
+    request_nodes = {}  # (request, node_id)
+    scope_nodes = {}  # (package_name, node_id)
+
+    # -- graph creation basics
+
+    node_color = "#F6F6F6"
+    request_color = "#FFFFAA"
+    solved_color = "#AAFFAA"
+    node_fontsize = 10
+    counter = [1]
+
+    def _uid():
+        id_ = counter[0]
+        counter[0] += 1
+        return "_%d" % id_
+
+    def _add_edge(id1, id2, arrowsize=0.5):
+        e = (id1, id2)
+        if g.has_edge(e):
+            g.del_edge(e)
+        g.add_edge(e)
+        g.add_edge_attribute(e, ("arrowsize", str(arrowsize)))
+        return e
+
+    def _add_extraction_merge_edge(id1, id2):
+        e = _add_edge(id1, id2, 1)
+        g.add_edge_attribute(e, ("arrowhead", "odot"))
+
+    def _add_conflict_edge(id1, id2):
+        e = _add_edge(id1, id2, 1)
+        g.set_edge_label(e, "CONFLICT")
+        g.add_edge_attribute(e, ("style", "bold"))
+        g.add_edge_attribute(e, ("color", "red"))
+        g.add_edge_attribute(e, ("fontcolor", "red"))
+
+    def _add_cycle_edge(id1, id2):
+        e = _add_edge(id1, id2, 1)
+        g.set_edge_label(e, "CYCLE")
+        g.add_edge_attribute(e, ("style", "bold"))
+        g.add_edge_attribute(e, ("color", "red"))
+        g.add_edge_attribute(e, ("fontcolor", "red"))
+
+    def _add_reduct_edge(id1, id2, label):
+        e = _add_edge(id1, id2, 1)
+        g.set_edge_label(e, label)
+        g.add_edge_attribute(e, ("fontsize", node_fontsize))
+
+    def _add_node(label, color, style):
+        attrs = [("label", label),
+                 ("fontsize", node_fontsize),
+                 ("fillcolor", color),
+                 ("style", '"%s"' % style)]
+        id_ = _uid()
+        g.add_node(id_, attrs=attrs)
+        return id_
+
+    def _add_request_node(request, initial_request=False):
+        id_ = request_nodes.get(request)
+        if id_ is not None:
+            return id_
+
+        label = str(request)
+        if initial_request:
+            color = request_color
+        else:
+            color = node_color
+
+        id_ = _add_node(label, color, "filled,dashed")
+        request_nodes[request] = id_
+        return id_
+
+    def _add_scope_node(scope):
+        id_ = scope_nodes.get(scope.package_name)
+        if id_ is not None:
+            return id_
+
+        variant = scope.variant
+        if variant:
+            label = str(variant)
+            color = solved_color
+            style = "filled"
+        elif scope.is_conflict:
+            label = scope.label
+            color = node_color
+            style = "filled,dashed"
+        else:
+            label = scope.label
+            color = node_color
+            style = "filled"
+
+        id_ = _add_node(label, color, style)
+        scope_nodes[scope.package_name] = id_
+        return id_
+
+    def _add_reduct_node(request):
+        return _add_node(str(request), node_color, "filled,dashed")
+
+    # -- generate the graph
+
+    # create initial request nodes
+    for request in request_list:
+        _add_request_node(request, True)
+
+    # create scope nodes
+    for scope in phase_scopes:
+        if scope.is_conflict:
+            id1 = request_nodes.get(scope.package_request)
+            if id1 is not None:
+                # special case - a scope that matches an initial conflict
+                # request, we switch nodes so the request node becomes a scope
+                # node
+                scope_nodes[scope.package_name] = id1
+                del request_nodes[scope.package_request]
+                continue
+
+        _add_scope_node(scope)
+
+    # create (initial request -> scope) edges
+    for request in request_list:
+        id1 = request_nodes.get(request)
+        if id1 is not None:
+            id2 = scope_nodes.get(request.name)
+            if id2 is not None:
+                _add_edge(id1, id2)
+
+    # for solved scopes, create (scope -> requirement) edge
+    for scope in phase_scopes:
+        variant = scope.variant
+        if variant:
+            id1 = scope_nodes[scope.package_name]
+
+            for request in variant.requires_list.requirements:
+                id2 = _add_request_node(request)
+                _add_edge(id1, id2)
+
+    # add extractions
+    for (src_fam, _), dest_req in extractions.iteritems():
+        id1 = scope_nodes.get(src_fam)
+        if id1 is not None:
+            id2 = _add_request_node(dest_req)
+            _add_edge(id1, id2)
+
+    # add extraction intersections
+    extracted_fams = set(x[1] for x in extractions.iterkeys())
+    for fam in extracted_fams:
+        requests = [v for k, v in extractions.iteritems() if k[1] == fam]
+        if len(requests) > 1:
+            reqlist = RequirementList(requests)
+            if not reqlist.conflict:
+                merged_request = reqlist.get(fam)
+                for request in requests:
+                    if merged_request != request:
+                        id1 = _add_request_node(request)
+                        id2 = _add_request_node(merged_request)
+                        _add_extraction_merge_edge(id1, id2)
+
+    # add conflicts
+    fr = failure_reason
+    if fr:
+        if isinstance(fr, DependencyConflicts):
+            for conflict in fr.conflicts:
+                id1 = _add_request_node(conflict.dependency)
+                id2 = scope_nodes.get(conflict.conflicting_request.name)
+                if id2 is None:
+                    id2 = _add_request_node(conflict.conflicting_request)
+                _add_conflict_edge(id1, id2)
+
+                failure_nodes.add(id1)
+                failure_nodes.add(id2)
+        elif isinstance(fr, TotalReduction):
+            if len(fr.reductions) == 1:
+                # special case - singular total reduction
+                reduct = fr.reductions[0]
+                id1 = scope_nodes[reduct.name]
+                id2 = _add_request_node(reduct.dependency)
+                id3 = scope_nodes[reduct.conflicting_request.name]
+                _add_edge(id1, id2)
+                _add_conflict_edge(id2, id3)
+
+                failure_nodes.add(id1)
+                failure_nodes.add(id2)
+                failure_nodes.add(id3)
+            else:
+                for reduct in fr.reductions:
+                    id1 = scope_nodes[reduct.name]
+                    id2 = _add_reduct_node(reduct.dependency)
+                    id3 = scope_nodes[reduct.conflicting_request.name]
+                    _add_reduct_edge(id1, id2, reduct.reducee_str())
+                    _add_conflict_edge(id2, id3)
+
+                    failure_nodes.add(id1)
+                    failure_nodes.add(id2)
+                    failure_nodes.add(id3)
+        elif isinstance(fr, Cycle):
+            for i, pkg in enumerate(fr.packages):
+                id1 = scope_nodes[pkg.name]
+                failure_nodes.add(id1)
+                pkg2 = fr.packages[(i + 1) % len(fr.packages)]
+                id2 = scope_nodes[pkg2.name]
+                _add_cycle_edge(id1, id2)
+
+    # connect leaf-node requests to a matching scope, if any
+    for request, id1 in request_nodes.iteritems():
+        if not g.neighbors(id1):  # leaf node
+            id2 = scope_nodes.get(request.name)
+            if id2 is not None:
+                scope = scopes.get(request.name)
+                if not request.conflicts_with(scope.package_request):
+                    _add_edge(id1, id2)
+
+    # prune nodes not related to failure
+    if prune_unfailed and failure_nodes:
+        access_dict = accessibility(g)
+        del_nodes = set()
+
+        for n, access_nodes in access_dict.iteritems():
+            if not (set(access_nodes) & failure_nodes):
+                del_nodes.add(n)
+
+        for n in del_nodes:
+            g.del_node(n)
+
+    return g
+
+
 def _short_req_str(package_request):
     """print shortened version of '==X|==Y|==Z' ranged requests."""
     if not package_request.conflict:
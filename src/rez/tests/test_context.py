@@ -2,11 +2,16 @@
 test resolved contexts
 """
 from rez.tests.util import TestBase, TempdirMixin
-from rez.resolved_context import ResolvedContext
+from rez.resolved_context import ResolvedContext, resolve_contexts
+from rez.resolver import ResolverStatus
+from rez.utils.graph_utils import write_compacted
 from rez.bind import hello_world
 from rez.utils.platform_ import platform_
+from rez.config import config
 import rez.vendor.unittest2 as unittest
 import subprocess
+import threading
+import time
 import os.path
 import os
 
@@ -62,6 +67,286 @@ class TestContext(TestBase, TempdirMixin):
         r2 = ResolvedContext.load(file)
         self.assertEqual(r.resolved_packages, r2.resolved_packages)
 
+    def test_graph(self):
+        """Test that the resolve graph is generated on demand."""
+        file = os.path.join(self.root, "test_graph.rxt")
+        r = ResolvedContext(["hello_world"])
+        self.assertTrue(r.has_graph)
+        self.assertEqual(r.graph_, None)
+        self.assertTrue("hello_world" in r.graph(as_dot=True))
+
+        # graph is stored by default
+        r = ResolvedContext(["hello_world"])
+        r.save(file)
+        r2 = ResolvedContext.load(file)
+        self.assertTrue(r2.graph_string)
+        self.assertEqual(sorted(r2.graph().edges()), sorted(r.graph().edges()))
+
+        # graph is not generated, nor stored, when disabled, but a successful
+        # resolve is regenerated on demand
+        config.override("store_resolve_graph", False)
+        r = ResolvedContext(["hello_world"])
+        r.save(file)
+        self.assertEqual(r.graph_, None)
+        r2 = ResolvedContext.load(file)
+        self.assertEqual(r2.graph_string, None)
+        self.assertTrue(r2.has_graph)
+        self.assertEqual(sorted(r2.graph().edges()), sorted(r.graph().edges()))
+
+        # a failed resolve may have been stopped early, so it isn't
+        r = ResolvedContext(["hello_world", "!hello_world"], max_fails=1)
+        self.assertFalse(r.success)
+        self.assertTrue(r.has_graph)
+        r.save(file)
+        r2 = ResolvedContext.load(file)
+        self.assertFalse(r2.has_graph)
+        self.assertEqual(r2.graph(), None)
+
+    def test_patch(self):
+        """Test patching of context."""
+        path = os.path.dirname(__file__)
+        packages_path = [os.path.join(path, "data", "solver", "packages")]
+
+        def _names(r):
+            return [x.qualified_package_name for x in r.resolved_packages]
+
+        def _labels(r):
+            g = r.graph()
+            return sorted(dict(g.node_attributes(x))["label"].strip('"')
+                          for x in g.nodes())
+
+        r = ResolvedContext(["pybah", "!python-2.5", "python<2.6.8"],
+                            package_paths=packages_path)
+        self.assertEqual(_names(r), ["python-2.6.0", "pybah-4"])
+
+        # unpatched packages are kept at their current version
+        r2 = r.patch(["^python"], incremental=True)
+        self.assertEqual(_names(r2), ["python-2.6.8", "pybah-4"])
+        self.assertEqual(map(str, r2.seed_locks), ["~pybah==4"])
+
+        # the seed locks are saved with the context, and its graph is never
+        # regenerated from the request alone
+        file = os.path.join(self.root, "test_patch.rxt")
+        config.override("store_resolve_graph", True)
+        r2.save(file)
+        r3 = ResolvedContext.load(file)
+        self.assertEqual(_names(r3), _names(r2))
+        self.assertEqual(r3.seed_locks, r2.seed_locks)
+        self.assertEqual(sorted(r3.graph().edges()), sorted(r2.graph().edges()))
+        self.assertEqual(_labels(r3), _labels(r2))
+        self.assertTrue("pybah-4[]" in _labels(r3))
+
+        config.override("store_resolve_graph", False)
+        r2.save(file)
+        r3 = ResolvedContext.load(file)
+        self.assertEqual(r3.seed_locks, r2.seed_locks)
+        self.assertFalse(r3.has_graph)
+        self.assertEqual(r3.graph(), None)
+
+        r2 = r.patch(["^python"], incremental=False,
+                     package_paths=packages_path)
+        self.assertEqual(_names(r2), ["python-2.5.2", "pybah-5"])
+
+        # unless they conflict with the patch
+        r = ResolvedContext(["python", "pybah"], package_paths=packages_path)
+        r2 = r.patch(["pybah-5"], incremental=True)
+        self.assertEqual(_names(r2), ["python-2.5.2", "pybah-5"])
+
+    def test_resolve_batch(self):
+        """Test resolving a batch of contexts."""
+        requests_list = [["hello_world"], [], ["hello_world", "!hello_world"]]
+        expected = [ResolvedContext(x) for x in requests_list]
+
+        for max_workers in (1, 2):
+            contexts = resolve_contexts(requests_list, max_workers=max_workers)
+            self.assertEqual([x.status for x in contexts],
+                             [x.status for x in expected])
+            self.assertEqual([x.resolved_packages for x in contexts if x.success],
+                             [x.resolved_packages for x in expected if x.success])
+            self.assertTrue(all(x.graph() is not None for x in contexts))
+
+        # graphs of failed resolves are those of the worker's resolve
+        path = os.path.dirname(__file__)
+        packages_path = [os.path.join(path, "data", "solver", "packages")]
+        requests_list = [["pydad", "pyodd", "pysplit-7"],
+                         ["pyodd<2", "python-2.7"]]
+        kwargs = dict(package_paths=packages_path, max_fails=1)
+        expected = [ResolvedContext(x, **kwargs) for x in requests_list]
+
+        contexts = resolve_contexts(requests_list, max_workers=2, **kwargs)
+        for context, expected_context in zip(contexts, expected):
+            self.assertEqual(context.status, ResolverStatus.failed)
+            self.assertEqual(context.graph_string,
+                             write_compacted(expected_context.graph()))
+
+    def test_resolve_cache(self):
+        """Test caching of resolves in a local directory."""
+        from rez.utils.resolve_cache import FileSystemResolveCache
+
+        cache_path = os.path.join(self.root, "resolve_cache")
+        self.update_settings(dict(resolve_caching=True,
+                                  memcached_uri=[],
+                                  resolve_cache_path=cache_path))
+
+        r = ResolvedContext(["hello_world"])
+        self.assertFalse(r.from_cache)
+        r2 = ResolvedContext(["hello_world"])
+        self.assertTrue(r2.from_cache)
+        self.assertEqual(r2.resolved_packages, r.resolved_packages)
+
+        # a release into the family invalidates the entry
+        packages_path = config.packages_path[0]
+        fam_path = os.path.join(packages_path, "hello_world")
+        t = os.path.getmtime(fam_path) + 10
+        os.utime(fam_path, (t, t))
+
+        r3 = ResolvedContext(["hello_world"])
+        self.assertFalse(r3.from_cache)
+        self.assertTrue(ResolvedContext(["hello_world"]).from_cache)
+
+        # timestamped resolves can use the non-timestamped entry, or their own
+        r4 = ResolvedContext(["hello_world"], timestamp=int(t) + 10)
+        self.assertTrue(r4.from_cache)
+        r5 = ResolvedContext(["hello_world"], timestamp=int(t) - 1)
+        self.assertFalse(r5.from_cache)
+        r6 = ResolvedContext(["hello_world"], timestamp=int(t) - 1)
+        self.assertTrue(r6.from_cache)
+
+        # least recently used entries are evicted first
+        cache = FileSystemResolveCache(os.path.join(self.root, "lru_cache"))
+        for i in range(4):
+            cache.set(str(i), 'x' * 1000)
+            path = cache._filepath(cache._qualified_key(str(i)))
+            os.utime(path, (i, i))
+
+        self.assertEqual(cache.get("0"), 'x' * 1000)  # now most recently used
+        cache.evict(2500)
+        self.assertEqual([cache.get(str(i)) is not None for i in range(4)],
+                         [True, False, False, True])
+
+        cache.delete("0")
+        self.assertEqual(cache.get("0"), None)
+
+        # entries owned by another user are ignored
+        if hasattr(os, "getuid"):
+            getuid = os.getuid
+            os.getuid = lambda: getuid() + 1
+            try:
+                self.assertEqual(cache.get("3"), None)
+            finally:
+                os.getuid = getuid
+            self.assertEqual(cache.get("3"), 'x' * 1000)
+
+        # a cache that can't be written to does not fail the resolve
+        filepath = os.path.join(self.root, "not_a_dir")
+        open(filepath, 'w').close()
+        self.update_settings(dict(resolve_caching=True,
+                                  memcached_uri=[],
+                                  resolve_lease_timeout=0,
+                                  resolve_cache_path=filepath))
+        r = ResolvedContext(["hello_world"])
+        self.assertTrue(r.success)
+        self.assertFalse(r.from_cache)
+
+    def test_resolve_lease(self):
+        """Test that identical concurrent resolves wait on each other."""
+        from rez.utils.resolve_cache import FileSystemResolveCache
+        from rez.resolver import Resolver
+
+        # leases are exclusive, and expire
+        cache = FileSystemResolveCache(os.path.join(self.root, "lease_cache"))
+        self.assertTrue(cache.add("lease", 1, 60))
+        self.assertFalse(cache.add("lease", 2, 60))
+        self.assertEqual(cache.get("lease"), 1)
+        cache.delete("lease")
+        self.assertTrue(cache.add("lease", 3, 0))
+        time.sleep(0.1)
+        self.assertEqual(cache.get("lease"), None)
+        self.assertTrue(cache.add("lease", 4, 0))
+
+        cache_path = os.path.join(self.root, "lease_resolve_cache")
+        cache = FileSystemResolveCache(cache_path)
+        self.update_settings(dict(resolve_caching=True,
+                                  memcached_uri=[],
+                                  resolve_cache_path=cache_path,
+                                  resolve_lease_timeout=1))
+
+        # find the keys used by the resolve, and its cached result
+        keys = {}
+        release_lease = Resolver._release_lease
+
+        def _release_lease(resolver):
+            keys["lease"] = resolver._lease_key
+            keys["solve"] = resolver._cache_key()
+            release_lease(resolver)
+
+        Resolver._release_lease = _release_lease
+        try:
+            r = ResolvedContext(["hello_world"])
+        finally:
+            Resolver._release_lease = release_lease
+
+        self.assertFalse(r.from_cache)
+        self.assertEqual(cache.get(keys["lease"]), None)
+        solver_dict = cache.get(keys["solve"])
+        self.assertNotEqual(solver_dict, None)
+
+        poll_interval = Resolver.lease_poll_interval
+        Resolver.lease_poll_interval = 0.05
+        try:
+            # the lease holder never stores a result, so the resolve gives up
+            # waiting, and solves itself
+            cache.delete(keys["solve"])
+            self.assertTrue(cache.add(keys["lease"], {}, 60))
+            t = time.time()
+            r = ResolvedContext(["hello_world"])
+            self.assertFalse(r.from_cache)
+            self.assertTrue(time.time() - t >= 1)
+
+            # the lease holder stores a result, which the resolve then uses
+            cache.delete(keys["solve"])
+
+            def _finish_resolve():
+                time.sleep(0.2)
+                cache.set(keys["solve"], solver_dict)
+                cache.delete(keys["lease"])
+
+            thread = threading.Thread(target=_finish_resolve)
+            thread.start()
+            r = ResolvedContext(["hello_world"])
+            thread.join()
+            self.assertTrue(r.from_cache)
+
+            # a lease that can't be read yet is still held
+            cache.delete(keys["solve"])
+            filepath = cache._filepath(cache._qualified_key(keys["lease"]))
+            with open(filepath, 'w') as f:
+                f.write("partial")
+            t = time.time()
+            r = ResolvedContext(["hello_world"])
+            self.assertFalse(r.from_cache)
+            self.assertTrue(time.time() - t >= 1)
+        finally:
+            Resolver.lease_poll_interval = poll_interval
+
+        # an unusable cache directory behaves as an empty cache
+        filepath = os.path.join(self.root, "lease_not_a_dir")
+        open(filepath, 'w').close()
+        cache = FileSystemResolveCache(os.path.join(filepath, "cache"))
+        self.assertEqual(cache.get("lease"), None)
+        self.assertFalse(cache.exists("lease"))
+        cache.set("lease", 1)
+        self.assertTrue(cache.add("lease", 1, 60))
+
+        self.update_settings(dict(resolve_caching=True,
+                                  memcached_uri=[],
+                                  resolve_cache_path=cache.path,
+                                  resolve_lease_timeout=60))
+        t = time.time()
+        r = ResolvedContext(["hello_world"])
+        self.assertTrue(r.success)
+        self.assertTrue(time.time() - t < 60)
+
 
 if __name__ == '__main__':
     unittest.main()
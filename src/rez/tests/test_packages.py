@@ -2,14 +2,14 @@
 test package iteration and serialization
 """
 from rez.packages_ import iter_package_families, iter_packages, get_package, \
-    create_package, get_developer_package
+    create_package, get_developer_package, get_latest_package
 from rez.package_resources_ import package_release_keys
 from rez.package_repository import create_memory_package_repository
 from rez.tests.util import TestBase, TempdirMixin
 from rez.utils.formatting import PackageRequest
 from rez.utils.data_utils import SourceCode
 import rez.vendor.unittest2 as unittest
-from rez.vendor.version.version import Version
+from rez.vendor.version.version import Version, VersionRange
 import os.path
 import os
 
@@ -260,6 +260,250 @@ class TestPackages(TestBase, TempdirMixin):
             data_ = _data(installed_package)
             self.assertDictEqual(data, data_)
 
+    def test_8(self):
+        """test the filesystem repository index."""
+        from rez.package_repository import package_repository_manager
+        import shutil
+
+        repo_path = os.path.join(self.root, "indexed_packages")
+        shutil.copytree(self.py_packages_path, repo_path)
+        self.update_settings(dict(
+            plugins=dict(package_repository=dict(filesystem=dict(
+                use_index=True)))))
+
+        def _packages():
+            families = iter_package_families(paths=[repo_path])
+            return _to_qnames(x for fam in families for x in fam.iter_packages())
+
+        repo = package_repository_manager.get_repository(repo_path)
+        expected_packages = _packages()
+        package = get_package("versioned", "3.0", paths=[repo_path])
+        expected_data = package.validated_data()
+        self.assertEqual(repo.get_index(), None)
+
+        repo.update_index()
+        self.assertNotEqual(repo.get_index(), None)
+        self.assertNotEqual(repo.get_index_family("versioned"), None)
+        self.assertEqual(_packages(), expected_packages)
+
+        # rebuilding reads package files edited in place, not the old index
+        family_path = os.path.join(repo_path, "versioned")
+        st = os.stat(family_path)
+        filepath = os.path.join(family_path, "3.0", "package.py")
+        with open(filepath, 'a') as f:
+            f.write("\ndescription = 'edited'\n")
+        os.utime(family_path, (st.st_atime, st.st_mtime))
+        repo.update_index()
+        package = get_package("versioned", "3.0", paths=[repo_path])
+        self.assertEqual(package.description, "edited")
+        expected_data = package.validated_data()
+
+        # package data is read from the index, not the package file
+        os.remove(os.path.join(repo_path, "versioned", "3.0", "package.py"))
+        package = get_package("versioned", "3.0", paths=[repo_path])
+        self.assertDictEqual(package.validated_data(), expected_data)
+
+        # a release into the family makes its index entry stale
+        os.utime(os.path.join(repo_path, "versioned"), None)
+        repo.clear_caches()
+        self.assertEqual(repo.get_index_family("versioned"), None)
+        self.assertNotEqual(repo.get_index_family("unversioned_py"), None)
+        package = get_package("versioned", "3.0", paths=[repo_path])
+        self.assertRaises(Exception, package.validate_data)
+
+        # installing a variant updates the index
+        path = os.path.join(self.packages_base_path, "developer")
+        package = get_developer_package(path)
+        for variant in package.iter_variants():
+            variant.install(repo_path)
+
+        repo.clear_caches()
+        self.assertNotEqual(repo.get_index(), None)
+        self.assertNotEqual(repo.get_index_family(package.name), None)
+        installed_package = get_package(package.name, package.version,
+                                        paths=[repo_path])
+        self.assertEqual(len(list(installed_package.iter_variants())),
+                         len(list(package.iter_variants())))
+
+        # adding a family makes the whole index stale
+        os.mkdir(os.path.join(repo_path, "newfamily"))
+        repo.clear_caches()
+        self.assertEqual(repo.get_index(), None)
+        expected_packages.add(installed_package.qualified_name)
+        self.assertEqual(_packages(), expected_packages)
+
+    def test_9(self):
+        """test the package file disk cache."""
+        from rez.serialise import load_from_file, get_package_file_cache, \
+            _package_file_cache_key, FileFormat
+        import shutil
+
+        cache_path = os.path.join(self.root, "package_file_cache")
+        self.update_settings(dict(package_file_cache_path=cache_path))
+        cache = get_package_file_cache()
+
+        path = os.path.join(self.root, "cached_packages")
+        shutil.copytree(os.path.join(self.py_packages_path, "versioned"), path)
+        filepath = os.path.join(path, "3.0", "package.py")
+        data = load_from_file(filepath, FileFormat.py)
+        self.assertEqual(cache.get_stats()["entries"], 1)
+
+        # later loads are read from the cache
+        key = _package_file_cache_key(os.path.realpath(filepath),
+                                      FileFormat.py, None)
+        self.assertEqual(cache.get(key), data)
+        cache.set(key, dict(data, description="from cache"))
+        data_ = load_from_file(filepath, FileFormat.py)
+        self.assertEqual(data_["description"], "from cache")
+
+        # but not once the file has changed
+        with open(filepath, 'a') as f:
+            f.write("\n")
+        self.assertEqual(load_from_file(filepath, FileFormat.py), data)
+        self.assertEqual(cache.get_stats()["entries"], 2)
+
+        cache.clear()
+        self.assertEqual(cache.get_stats()["entries"], 0)
+
+        # an unusable cache falls back to loading the file
+        filepath_ = os.path.join(self.root, "package_file_cache_file")
+        open(filepath_, 'w').close()
+        self.update_settings(dict(
+            package_file_cache_path=os.path.join(filepath_, "cache")))
+        self.assertEqual(load_from_file(filepath, FileFormat.py), data)
+
+    def test_10(self):
+        """test the fast path for attributes read by the solver."""
+        from rez.package_repository import package_repository_manager
+        from rez.package_resources_ import package_pod_converters
+        from rez.exceptions import PackageMetadataError
+
+        def _data():
+            package_repository_manager.clear_caches()
+            result = {}
+            for family in iter_package_families():
+                for package in family.iter_packages():
+                    if package.qualified_name == "versioned-2.0":
+                        continue  # deliberately broken package
+                    requires = [x.get_requires(build_requires=True)
+                                for x in package.iter_variants()]
+                    result[package.qualified_name] = \
+                        (package.validated_data(), requires)
+            return result
+
+        # converted values match those validated by the schema
+        converters = package_pod_converters.copy()
+        package_pod_converters.clear()
+        try:
+            expected_data = _data()
+        finally:
+            package_pod_converters.update(converters)
+
+        self.assertEqual(_data(), expected_data)
+
+        # values not in the usual form are validated by the schema
+        repo = create_memory_package_repository(
+            {"foo": {"1.0": dict(name="foo", version="1.0", requires="bah")}})
+        family = repo.get_package_family("foo")
+        package = repo.iter_packages(family).next()
+        self.assertRaises(PackageMetadataError, getattr, package, "requires")
+
+        # as are values that fail to convert
+        repo = create_memory_package_repository(
+            {"foo": {"1.0": dict(name="foo", version="1.0",
+                                 requires=["bah-!!"])}})
+        family = repo.get_package_family("foo")
+        package = repo.iter_packages(family).next()
+        self.assertRaises(PackageMetadataError, getattr, package, "requires")
+
+    def test_11(self):
+        """test loading packages ahead of the caller, on threads."""
+        from rez.package_repository import package_repository_manager
+        from rez.packages_ import prefetch_packages
+
+        def _packages():
+            package_repository_manager.clear_caches()
+            return [package
+                    for family in iter_package_families()
+                    for package in family.iter_packages()]
+
+        # order is preserved, and packages are loaded
+        packages = _packages()
+        expected_names = [x.qualified_name for x in packages]
+        prefetched = list(prefetch_packages(packages, 4))
+        self.assertEqual([x.qualified_name for x in prefetched],
+                         expected_names)
+        self.assertTrue(all("_data" in x.resource.__dict__
+                            for x in prefetched
+                            if x.qualified_name != "versioned-2.0"))
+
+        # the caller can stop iterating early
+        it = prefetch_packages(_packages(), 4)
+        self.assertEqual(it.next().qualified_name, expected_names[0])
+        it.close()
+
+        # a package that fails to load is yielded, and raises on access
+        package_repository_manager.clear_caches()
+        packages = list(iter_packages("versioned", "2+",
+                                      paths=[self.py_packages_path],
+                                      load_threads=4))
+        self.assertEqual(len(packages), 2)
+        for package in packages:
+            if str(package.version) == "2.0":
+                self.assertRaises(Exception, getattr, package, "description")
+            else:
+                self.assertEqual(package.version, Version("3.0"))
+
+    def test_12(self):
+        """test that missing families are found without checking the
+        filesystem."""
+        from rez.package_repository import package_repository_manager
+        import shutil
+
+        repo_path = os.path.join(self.root, "listed_packages")
+        shutil.copytree(self.py_packages_path, repo_path)
+        repo = package_repository_manager.get_repository(repo_path)
+        repo.clear_caches()
+
+        self.assertEqual(repo.get_package_family("missing"), None)
+        self.assertNotEqual(repo.get_package_family("versioned"), None)
+        self.assertNotEqual(repo.get_package_family("multi"), None)
+
+        isdir = os.path.isdir
+        checked = []
+
+        def _isdir(path):
+            checked.append(path)
+            return isdir(path)
+
+        os.path.isdir = _isdir
+        try:
+            self.assertEqual(repo.get_package_family("missing2"), None)
+            self.assertEqual(repo.get_package_family("missing3"), None)
+        finally:
+            os.path.isdir = isdir
+        self.assertEqual(checked, [])
+
+        # a new family changes the repository directory
+        os.mkdir(os.path.join(repo_path, "missing2"))
+        repo.clear_caches()
+        self.assertNotEqual(repo.get_package_family("missing2"), None)
+
+    def test_13(self):
+        """test getting the latest package in a range."""
+        res = _to_qnames(iter_packages('python', "2.6|2.7+"))
+        self.assertEqual(res, set(['python-2.6.0', 'python-2.6.8',
+                                   'python-2.7.0']))
+
+        package = get_latest_package('python')
+        self.assertEqual(package.qualified_name, 'python-2.7.0')
+        package = get_latest_package('python', VersionRange("<2.7"))
+        self.assertEqual(package.qualified_name, 'python-2.6.8')
+        package = get_latest_package('python', "2.5|2.6.0")
+        self.assertEqual(package.qualified_name, 'python-2.6.0')
+        self.assertEqual(get_latest_package('python', VersionRange("3+")), None)
+        self.assertEqual(get_latest_package('missing'), None)
+
 
 class TestMemoryPackages(TestBase):
     def test_1_memory_variant_parent(self):
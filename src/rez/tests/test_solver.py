@@ -7,7 +7,11 @@ from rez.config import config
 import rez.vendor.unittest2 as unittest
 from rez.tests.util import TestBase
 import itertools
+import threading
 import os.path
+import tempfile
+import shutil
+import time
 
 
 class TestSolver(TestBase):
@@ -152,6 +156,10 @@ class TestSolver(TestBase):
         """More complex failures."""
         self._fail("bahish", "pybah<5")
 
+        # later phases hit a conflict already found in an earlier phase
+        s = self._fail("pydad", "pyodd", "pysplit-7")
+        self.assertTrue(s.num_nogood_hits > 0)
+
     def test_06(self):
         """Basic solves involving multiple packages."""
         self._solve(["nada", "nopy"],
@@ -212,6 +220,264 @@ class TestSolver(TestBase):
         self._solve(["pyvariants", "python", "nada"],
                     ["python-2.6.8[]", "nada[]", "pyvariants-2[1]"])
 
+    def test_11_shared_variant_cache(self):
+        """Test that loaded variants are shared between solvers."""
+        from rez.package_repository import package_repository_manager
+        loaded = []
+
+        def _solve():
+            del loaded[:]
+            s = Solver([Requirement("pyfoo")],
+                       self.packages_path,
+                       package_load_callback=loaded.append)
+            s.solve()
+            self.assertEqual(s.status, SolverStatus.solved)
+
+        package_repository_manager.clear_caches()
+        _solve()
+        self.assertTrue(loaded)
+        _solve()
+        self.assertEqual(loaded, [])
+
+        # clearing repository caches also clears the shared variants
+        package_repository_manager.clear_caches()
+        _solve()
+        self.assertTrue(loaded)
+
+        config.override("variant_caching_maxsize", 0)
+        _solve()
+        self.assertTrue(loaded)
+
+    def test_12_trace(self):
+        """Test the structured solver trace."""
+        reqs = [Requirement("python"), Requirement("pyodd")]
+        s = Solver(reqs, self.packages_path, trace=True)
+        s.solve()
+        self.assertEqual(s.status, SolverStatus.solved)
+
+        records = s.get_trace()
+        steps = [x for x in records if x["event"] == "step"]
+        summary = records[-1]
+        self.assertEqual(len(steps), s.num_solves)
+        self.assertEqual(summary["event"], "summary")
+        self.assertEqual(summary["status"], "solved")
+        self.assertEqual(summary["max_depth"], max(x["depth"] for x in steps))
+        self.assertTrue(summary["counts"]["split"] > 0)
+        self.assertTrue(summary["counts"]["extract"] > 0)
+        self.assertTrue(set(summary["load_times"]) >= set(["python", "pyodd"]))
+
+        s = Solver(reqs, self.packages_path, trace=False)
+        s.solve()
+        self.assertEqual(s.get_trace(), None)
+
+    def test_13_reduction_scheduling(self):
+        """Test that reductions are only scheduled between dependent scopes."""
+        reqs = [Requirement(x) for x in ("python", "pyodd", "nada", "nopy")]
+        s1 = Solver(reqs, self.packages_path, optimised=True, trace=True)
+        s2 = Solver(reqs, self.packages_path, optimised=False, trace=True)
+        s1.solve()
+        s2.solve()
+
+        self.assertEqual(s1.status, SolverStatus.solved)
+        self.assertEqual([str(x) for x in s1.resolved_packages],
+                         [str(x) for x in s2.resolved_packages])
+
+        counts1 = s1.get_trace()[-1]["counts"]
+        counts2 = s2.get_trace()[-1]["counts"]
+        self.assertEqual(counts1["reduction"], counts2["reduction"])
+        self.assertTrue(counts1["reduce"] < counts2["reduce"])
+
+    def test_14_budgets(self):
+        """Test that solves exceeding a budget abort with diagnostics."""
+        from rez.resolver import Resolver, ResolverStatus
+        reqs = [Requirement(x) for x in ("pydad", "pyodd", "pysplit-7")]
+
+        s = Solver(reqs, self.packages_path, solve_limit=4)
+        s.solve()
+        self.assertEqual(s.status, SolverStatus.unsolved)
+        self.assertEqual(s.num_solves, 4)
+        self.assertEqual(s.conflict_counts()["python"], s.num_fails)
+
+        lines = s.abort_reason.split('\n')
+        self.assertTrue(lines[0].startswith("solve budget exceeded: solve limit"))
+        self.assertTrue(lines[1].startswith("deepest phase reached {2,0}:"))
+        self.assertEqual(lines[2], "most frequent conflicts: python (2)")
+
+        s = Solver(reqs, self.packages_path, time_limit=0)
+        s.solve()
+        self.assertEqual(s.status, SolverStatus.unsolved)
+        self.assertTrue("time limit" in s.abort_reason)
+
+        # budgets continue from a previous solve
+        s = Solver(reqs, self.packages_path, solve_limit=4,
+                   budget_start=(time.time(), None, 3))
+        s.solve()
+        self.assertEqual(s.num_solves, 1)
+        self.assertEqual(s.get_budget_state()[2], 4)
+        s = Solver(reqs, self.packages_path, time_limit=5,
+                   budget_start=(time.time() - 10, None, 0))
+        s.solve()
+        self.assertTrue("time limit" in s.abort_reason)
+
+        # the default (config) budget is unlimited
+        s = Solver(reqs, self.packages_path)
+        s.solve()
+        self.assertEqual(s.status, SolverStatus.failed)
+
+        config.override("resolve_solve_limit", 2)
+        r = Resolver(reqs, self.packages_path, caching=False)
+        r.solve()
+        self.assertEqual(r.status, ResolverStatus.aborted)
+        self.assertTrue("solve limit of 2" in r.failure_description)
+
+    def test_15_prefetch(self):
+        """Test that prefetching families does not change the resolve."""
+        from rez.package_repository import package_repository_manager
+        reqs = [Requirement(x) for x in ("python", "pyodd", "nada", "nopy")]
+
+        package_repository_manager.clear_caches()
+        s1 = Solver(reqs, self.packages_path, prefetch_threads=4, trace=True)
+        s1.solve()
+        self.assertEqual(s1.status, SolverStatus.solved)
+        self.assertTrue(s1.get_trace()[-1]["counts"].get("prefetch", 0) > 0)
+
+        package_repository_manager.clear_caches()
+        s2 = Solver(reqs, self.packages_path, prefetch_threads=0, trace=True)
+        s2.solve()
+        self.assertEqual([str(x) for x in s1.resolved_packages],
+                         [str(x) for x in s2.resolved_packages])
+        self.assertEqual(s1.num_solves, s2.num_solves)
+        self.assertFalse("prefetch" in s2.get_trace()[-1]["counts"])
+
+        # filtered packages are not loaded, and no threads outlive the solve
+        from rez.package_filter import PackageFilterList, GlobRule
+        package_filter = PackageFilterList()
+        package_filter.add_exclusion(GlobRule("pybah-4"))
+        num_threads = threading.active_count()
+
+        package_repository_manager.clear_caches()
+        s = Solver([Requirement("pyodd")], self.packages_path,
+                   package_filter=package_filter, prefetch_threads=4)
+        s.solve()
+        self.assertEqual(s.status, SolverStatus.solved)
+        self.assertEqual(threading.active_count(), num_threads)
+
+        entries, _ = s.package_cache._get_shared_entries("pybah")
+        loaded = dict((str(x.version), "_data" in x.resource.__dict__)
+                      for x, _ in entries)
+        self.assertEqual(loaded, {"4": False, "5": True})
+
+    def test_16_speculation(self):
+        """Test that speculative solves match serial solves."""
+        requests = (("python", "pyodd"),
+                    ("pyvariants", "python", "nada"),
+                    ("pydad", "pyodd", "pysplit-7"),
+                    ("bahish", "pybah<5"))
+
+        for packages in requests:
+            reqs = [Requirement(x) for x in packages]
+            s1 = Solver(reqs, self.packages_path, speculative_workers=0)
+            s2 = Solver(reqs, self.packages_path, speculative_workers=2)
+            s1.solve()
+            s2.solve()
+
+            self.assertEqual(s1.status, s2.status)
+            if s1.status == SolverStatus.solved:
+                self.assertEqual([str(x) for x in s1.resolved_packages],
+                                 [str(x) for x in s2.resolved_packages])
+            else:
+                self.assertEqual(s1.failure_reason(), s2.failure_reason())
+            self.assertEqual(s1.num_solves, s2.num_solves)
+            self.assertEqual(s1.num_fails, s2.num_fails)
+
+    def test_17_nogood_store_size(self):
+        """Test that a capped nogood store does not change the result."""
+        from rez.solver import _NogoodStore
+        reqs = [Requirement(x) for x in ("pydad", "pyodd", "pysplit-7")]
+        s1 = Solver(reqs, self.packages_path)
+        s1.solve()
+
+        max_size = _NogoodStore.max_size
+        _NogoodStore.max_size = 1
+        try:
+            s2 = Solver(reqs, self.packages_path)
+            s2.solve()
+        finally:
+            _NogoodStore.max_size = max_size
+
+        self.assertEqual(s2.status, SolverStatus.failed)
+        self.assertEqual(s1.failure_reason(), s2.failure_reason())
+        self.assertTrue(len(s2.nogoods.nogoods) <= 1)
+        self.assertTrue(s1.num_nogood_hits >= s2.num_nogood_hits)
+
+    def test_18_nogood_graph(self):
+        """Test graphing phases that hit a conflict found in another phase."""
+        # here the conflict found by the first failed phase involves a scope
+        # that the phases hitting that conflict do not have
+        packages = {
+            ("f1", "6"): ["f6-6+"],
+            ("f2", "8"): [],
+            ("f3", "7"): [],
+            ("f3", "8"): [],
+            ("f4", "4"): ["f1", "f3-6+"],
+            ("f5", "5"): ["f9-7+"],
+            ("f6", "6"): ["f9-2"],
+            ("f6", "8"): ["f5-5"],
+            ("f8", "7"): ["f4-4"],
+            ("f9", "2"): ["f5-4+"],
+            ("f9", "7"): ["f1-8"],
+            ("f9", "8"): ["f4-6+"]}
+
+        path = tempfile.mkdtemp(prefix="rez_test_")
+        try:
+            for (name, version), requires in packages.iteritems():
+                package_path = os.path.join(path, name, version)
+                os.makedirs(package_path)
+                with open(os.path.join(package_path, "package.py"), 'w') as f:
+                    f.write("name = %r\nversion = %r\nrequires = %r\n"
+                            % (name, version, requires))
+
+            s = Solver([Requirement("f8"), Requirement("f2")], [path])
+            s.solve()
+            self.assertEqual(s.status, SolverStatus.failed)
+            self.assertTrue(s.num_nogood_hits > 0)
+
+            fail_graphs = [s.get_fail_graph(i)
+                           for i in range(len(s.failed_phase_list))]
+            self.assertTrue(s.get_graph().nodes())
+            for g in fail_graphs:
+                self.assertTrue(g.nodes())
+        finally:
+            shutil.rmtree(path)
+
+    def test_19_shared_variant_cache_release(self):
+        """Test that shared variants are reloaded after a release."""
+        path = tempfile.mkdtemp(prefix="rez_test_")
+        try:
+            packages_path = os.path.join(path, "packages")
+            shutil.copytree(self.packages_path[0], packages_path)
+
+            def _solve():
+                s = Solver([Requirement("pyfoo")], [packages_path])
+                s.solve()
+                self.assertEqual(s.status, SolverStatus.solved)
+                return [str(x) for x in s.resolved_packages]
+
+            self.assertTrue("pyfoo-3.1.0[]" in _solve())
+
+            family_path = os.path.join(packages_path, "pyfoo")
+            package_path = os.path.join(family_path, "3.2.0")
+            os.mkdir(package_path)
+            with open(os.path.join(package_path, "package.py"), 'w') as f:
+                f.write('name = "pyfoo"\nversion = "3.2.0"\n')
+
+            t = time.time() + 10
+            os.utime(family_path, (t, t))
+            self.assertTrue("pyfoo-3.2.0[]" in _solve())
+        finally:
+            shutil.rmtree(path)
+
+
 if __name__ == '__main__':
     unittest.main()
 
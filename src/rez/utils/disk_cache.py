@@ -0,0 +1,320 @@
+"""
+A key/value cache stored in a local directory, shared between processes.
+"""
+from rez.utils.memcached import cache_interface_version
+from rez.utils.logging_ import print_warning
+from hashlib import md5
+import cPickle
+import errno
+import stat
+import tempfile
+import time
+import os
+import os.path
+
+
+class DiskCache(object):
+    """Cache stored in a local directory.
+
+    Each entry is a file, named after the hash of its key. Entries are written
+    to a temporary file that is then renamed into place, so readers (in this
+    or any other process) never see a partially written entry. Reading an
+    entry updates its modification time, and when the total size of the
+    entries exceeds the maximum, the least recently used entries are deleted.
+
+    Entries stored with `add` are created exclusively, and expire after their
+    timeout, so they can be used as leases between processes.
+
+    Entries are loaded with pickle, so the directory must be private to one
+    user. It is created readable by its owner only, and entries owned by
+    another user are ignored.
+
+    The cache is best-effort: if the directory can't be read or written, a
+    warning is logged (once per directory), and the cache behaves as if it
+    were empty.
+    """
+    tmp_prefix = ".tmp-"
+
+    # a temp file this old was left by a process that did not finish writing
+    stale_tmp_seconds = 3600
+
+    # directories that errors have been logged for
+    warned_paths = set()
+
+    def __init__(self, path, max_size=None, evict_interval=1):
+        """Create the cache.
+
+        Args:
+            path (str): Directory to store entries in. It is created if it
+                does not exist.
+            max_size (int): Maximum total size of entries, in bytes. If None,
+                the size is not limited.
+            evict_interval (int): Check the size of the cache once every this
+                many entries stored. Checking lists the cache directory, so
+                caches that store many small entries should check less often.
+        """
+        self.path = path
+        self.max_size = max_size
+        self.evict_interval = evict_interval
+        self.num_sets = 0
+
+    def get(self, key):
+        """Get an entry.
+
+        Args:
+            key (str): Entry key.
+
+        Returns:
+            The stored value, or None if there is no entry.
+        """
+        key = self._qualified_key(key)
+        filepath = self._filepath(key)
+
+        try:
+            with open(filepath, "rb") as f:
+                if not self._is_owned(f):
+                    return None
+                key_, value, expiry = cPickle.load(f)
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                self._warn(e)
+            return None
+        except Exception:
+            return None  # unreadable, eg from an older rez
+
+        if key_ != key:
+            return None  # hash collision
+
+        if expiry and time.time() > expiry:
+            self._remove(filepath)
+            return None
+
+        try:
+            os.utime(filepath, None)
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value):
+        """Store an entry, replacing any existing entry.
+
+        Args:
+            key (str): Entry key.
+            value: Picklable object.
+        """
+        key = self._qualified_key(key)
+        filepath = self._filepath(key)
+        data = cPickle.dumps((key, value, 0), cPickle.HIGHEST_PROTOCOL)
+
+        try:
+            self._make_dir()
+            fd, tmp_filepath = tempfile.mkstemp(dir=self.path,
+                                                prefix=self.tmp_prefix)
+        except (IOError, OSError) as e:
+            self._warn(e)
+            return
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            self._rename(tmp_filepath, filepath)
+        except (IOError, OSError) as e:
+            self._remove(tmp_filepath)
+            self._warn(e)
+            return
+
+        if self.max_size is not None:
+            if self.num_sets % self.evict_interval == 0:
+                self.evict(self.max_size)
+            self.num_sets += 1
+
+    def add(self, key, value, timeout):
+        """Store an entry, only if there is no existing entry.
+
+        Args:
+            key (str): Entry key.
+            value: Picklable object.
+            timeout (int): Seconds after which the entry expires.
+
+        Returns:
+            bool: True if the entry was stored. Also True if the cache can't be
+            written to, so that callers using the entry as a lease do not wait
+            on an entry that can never be stored.
+        """
+        key = self._qualified_key(key)
+        filepath = self._filepath(key)
+        expiry = time.time() + timeout
+        data = cPickle.dumps((key, value, expiry), cPickle.HIGHEST_PROTOCOL)
+
+        try:
+            return self._add(filepath, data, timeout)
+        except (IOError, OSError) as e:
+            self._warn(e)
+            return True
+
+    def exists(self, key):
+        """Return True if there is an entry.
+
+        Unlike `get`, an entry that can't be read, such as one that `add` is
+        still writing, counts as existing.
+        """
+        if self.get(key) is not None:
+            return True
+
+        # expired entries have been removed by `get`
+        key = self._qualified_key(key)
+        return os.path.exists(self._filepath(key))
+
+    def delete(self, key):
+        """Delete an entry, if it exists."""
+        key = self._qualified_key(key)
+        self._remove(self._filepath(key))
+
+    def evict(self, max_size):
+        """Delete least recently used entries until the cache size is within
+        `max_size` bytes."""
+        entries = self._get_entries()
+        total = sum(x[1] for x in entries)
+        if total <= max_size:
+            return
+
+        entries.sort()
+        for _, size, filepath in entries:
+            self._remove(filepath)
+            total -= size
+            if total <= max_size:
+                break
+
+    def clear(self):
+        """Delete all entries."""
+        self.evict(0)
+
+    def get_stats(self):
+        """Get statistics about the cache.
+
+        Returns:
+            dict: Containing:
+            - entries: Number of entries;
+            - size: Total size of entries, in bytes;
+            - max_size: Maximum size, in bytes (None if unlimited);
+            - oldest: Last access time of the least recently used entry, or
+              None if there are no entries.
+        """
+        entries = self._get_entries()
+        return dict(entries=len(entries),
+                    size=sum(x[1] for x in entries),
+                    max_size=self.max_size,
+                    oldest=min(x[0] for x in entries) if entries else None)
+
+    def _get_entries(self):
+        # list (mtime, size, filepath) of each entry, removing stale temp files
+        entries = []
+        now = time.time()
+
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return entries
+
+        for name in names:
+            filepath = os.path.join(self.path, name)
+            try:
+                st = os.stat(filepath)
+            except OSError:
+                continue  # deleted by another process
+
+            if name.startswith(self.tmp_prefix):
+                if now - st.st_mtime > self.stale_tmp_seconds:
+                    self._remove(filepath)
+                continue
+
+            entries.append((st.st_mtime, st.st_size, filepath))
+
+        return entries
+
+    def _add(self, filepath, data, timeout):
+        self._make_dir()
+
+        for _ in range(2):
+            try:
+                fd = os.open(filepath, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+
+                # the entry may still be being written, so go by its age
+                try:
+                    age = time.time() - os.path.getmtime(filepath)
+                except OSError:
+                    continue  # deleted by another process, try again
+                if age < timeout:
+                    return False
+                self._remove(filepath)  # expired, try again
+                continue
+
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            return True
+
+        return False
+
+    def _warn(self, e):
+        if self.path not in self.warned_paths:
+            self.warned_paths.add(self.path)
+            print_warning("Disk cache %r is not usable, ignoring it: %s"
+                          % (self.path, e))
+
+    def _make_dir(self):
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path, stat.S_IRWXU)
+        except OSError:
+            if not os.path.isdir(self.path):  # another process may have made it
+                raise
+
+    @classmethod
+    def _is_owned(cls, f):
+        # True if the open file is owned by the current user
+        if not hasattr(os, "getuid"):
+            return True  # eg Windows
+        return (os.fstat(f.fileno()).st_uid == os.getuid())
+
+    def _qualified_key(self, key):
+        return "%s:%s" % (cache_interface_version, key)
+
+    def _filepath(self, key):
+        return os.path.join(self.path, md5(key).hexdigest())
+
+    @classmethod
+    def _rename(cls, src, dest):
+        try:
+            os.rename(src, dest)
+        except OSError:
+            # on Windows, rename fails if dest exists
+            if not os.path.exists(dest):
+                raise
+            cls._remove(dest)
+            os.rename(src, dest)
+
+    @classmethod
+    def _remove(cls, filepath):
+        try:
+            os.remove(filepath)
+        except OSError:
+            pass  # deleted by another process
+
+
+# Copyright 2013-2016 Allan Johns.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
@@ -47,9 +47,10 @@ class PackageRequest(Requirement):
         >>> print pr.name, pr.range
         foo 1.3+
     """
-    def __init__(self, s):
-        super(PackageRequest, self).__init__(s)
-        is_valid_package_name(self.name, True)
+    def _parse(self, s):
+        super(PackageRequest, self)._parse(s)
+        if s is not None:
+            is_valid_package_name(self.name, True)
 
 
 class StringFormatType(Enum):
@@ -85,6 +85,27 @@ class Client(object):
                         min_compress_len=min_compress_len)
         self.logger("SET: %s", key)
 
+    def add(self, key, val, time=0, min_compress_len=0):
+        """See memcache.Client.
+
+        Returns:
+            bool: True if the value was stored, False if the key already
+            exists (or there are no servers).
+        """
+        if not self.servers:
+            return False
+
+        key = self._qualified_key(key)
+        hashed_key = self.key_hasher(key)
+        val = (key, val)
+
+        result = self.client.add(key=hashed_key,
+                                 val=val,
+                                 time=time,
+                                 min_compress_len=min_compress_len)
+        self.logger("ADD: %s", key)
+        return bool(result)
+
     def get(self, key):
         """See memcache.Client.
 
@@ -109,6 +130,34 @@ class Client(object):
         self.logger("MISS: %s", key)
         return self.miss
 
+    def get_multi(self, keys):
+        """Get several values in a single request to the server(s).
+
+        Returns:
+            list: A value for each key, which is `self.miss` on cache miss.
+        """
+        if not self.servers:
+            return [self.miss] * len(keys)
+
+        keys = [self._qualified_key(x) for x in keys]
+        hashed_keys = [self.key_hasher(x) for x in keys]
+        entries = self.client.get_multi(hashed_keys)
+        results = []
+
+        for key, hashed_key in zip(keys, hashed_keys):
+            entry = entries.get(hashed_key)
+            if isinstance(entry, tuple) and len(entry) == 2:
+                key_, result = entry
+                if key_ == key:
+                    self.logger("HIT: %s", key)
+                    results.append(result)
+                    continue
+
+            self.logger("MISS: %s", key)
+            results.append(self.miss)
+
+        return results
+
     def delete(self, key):
         """See memcache.Client."""
         if self.servers:
@@ -0,0 +1,154 @@
+"""
+Storage of cached resolves.
+
+The resolver decides what to store and when an entry is stale (see
+`Resolver._get_cached_solve`). A resolve cache only stores, retrieves and
+deletes entries by key.
+"""
+from rez.config import config
+from rez.utils.memcached import memcached_client
+from rez.utils.disk_cache import DiskCache
+import os.path
+
+
+class ResolveCache(object):
+    """Abstract base class for resolve caches."""
+    def get(self, key):
+        """Get an entry.
+
+        Args:
+            key (str): Entry key.
+
+        Returns:
+            The stored value, or None if there is no entry.
+        """
+        raise NotImplementedError
+
+    def get_multi(self, keys):
+        """Get several entries.
+
+        Args:
+            keys (list of str): Entry keys.
+
+        Returns:
+            List of values, containing None for each missing entry.
+        """
+        return [self.get(x) for x in keys]
+
+    def set(self, key, value):
+        """Store an entry, replacing any existing entry.
+
+        Args:
+            key (str): Entry key.
+            value: Picklable object.
+        """
+        raise NotImplementedError
+
+    def add(self, key, value, timeout):
+        """Store an entry, only if there is no existing entry.
+
+        Args:
+            key (str): Entry key.
+            value: Picklable object.
+            timeout (int): Seconds after which the entry expires.
+
+        Returns:
+            bool: True if the entry was stored.
+        """
+        raise NotImplementedError
+
+    def exists(self, key):
+        """Return True if there is an entry.
+
+        Args:
+            key (str): Entry key.
+
+        Returns:
+            bool: True if there is an entry, even if it can't be read yet.
+        """
+        return self.get(key) is not None
+
+    def delete(self, key):
+        """Delete an entry, if it exists."""
+        raise NotImplementedError
+
+
+class MemcachedResolveCache(ResolveCache):
+    """Resolve cache stored in memcached."""
+    def __init__(self, servers):
+        """Create the cache.
+
+        Args:
+            servers (list of str): memcached server uri(s).
+        """
+        self.servers = servers
+
+    def get(self, key):
+        with self._client() as client:
+            value = client.get(key)
+        return value if value is not client.miss else None
+
+    def get_multi(self, keys):
+        with self._client() as client:
+            values = client.get_multi(keys)
+        return [(x if x is not client.miss else None) for x in values]
+
+    def set(self, key, value):
+        with self._client() as client:
+            client.set(key, value)
+
+    def add(self, key, value, timeout):
+        with self._client() as client:
+            return client.add(key, value, time=timeout)
+
+    def delete(self, key):
+        with self._client() as client:
+            client.delete(key)
+
+    def _client(self):
+        return memcached_client(self.servers, debug=config.debug_memcache)
+
+
+class FileSystemResolveCache(DiskCache, ResolveCache):
+    """Resolve cache stored in a local directory. See `DiskCache`."""
+
+
+def get_resolve_cache():
+    """Get the resolve cache specified by configuration.
+
+    Memcached is used if 'memcached_uri' is set, otherwise the local
+    directory 'resolve_cache_path', if set.
+
+    Returns:
+        `ResolveCache`, or None if resolve caching is disabled or not
+        configured.
+    """
+    if not config.resolve_caching:
+        return None
+
+    if config.memcached_uri:
+        return MemcachedResolveCache(config.memcached_uri)
+
+    if config.resolve_cache_path:
+        path = os.path.expanduser(config.resolve_cache_path)
+        max_size = config.resolve_cache_max_size
+        max_size = None if max_size < 0 else max_size * 1024 * 1024
+        return FileSystemResolveCache(path, max_size=max_size)
+
+    return None
+
+
+# Copyright 2013-2016 Allan Johns.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
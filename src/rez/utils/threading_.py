@@ -0,0 +1,97 @@
+"""
+Utilities related to running work on threads.
+"""
+
+
+def thread_map(func, iterable, max_workers):
+    """Like `map`, but calls `func` from a pool of threads.
+
+    This is useful when `func` spends most of its time waiting on I/O, such
+    as stat'ing files on a network filesystem.
+
+    Args:
+        func (callable): Function to call on each item.
+        iterable: Items to call `func` on.
+        max_workers (int): Maximum number of threads. If less than 2, or if
+            there are less than 2 items, `func` is called in this thread.
+
+    Returns:
+        List of results, in the same order as `iterable`. If any call raises
+        an exception, it is re-raised here.
+    """
+    items = list(iterable)
+    num_workers = min(max_workers, len(items))
+    if num_workers < 2:
+        return map(func, items)
+
+    from multiprocessing.pool import ThreadPool
+    pool = ThreadPool(num_workers)
+    try:
+        return pool.map(func, items, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def thread_imap(func, iterable, max_workers, window=None):
+    """Like `itertools.imap`, but calls `func` from a pool of threads, ahead
+    of the consumer.
+
+    Unlike `thread_map`, items are read from `iterable` lazily, and at most
+    `window` calls are made ahead of the result being consumed, so it is safe
+    to stop iterating early.
+
+    Args:
+        func (callable): Function to call on each item.
+        iterable: Items to call `func` on.
+        max_workers (int): Maximum number of threads. If less than 2, `func`
+            is called in this thread, as each result is consumed.
+        window (int): Maximum number of calls made ahead of the consumer.
+            Defaults to twice `max_workers`.
+
+    Returns:
+        Iterator of results, in the same order as `iterable`. If a call raises
+        an exception, it is re-raised when its result is reached.
+    """
+    if max_workers < 2:
+        for item in iterable:
+            yield func(item)
+        return
+
+    from multiprocessing.pool import ThreadPool
+    from collections import deque
+
+    window = window or (max_workers * 2)
+    pending = deque()
+    pool = None
+
+    try:
+        for item in iterable:
+            if pool is None:
+                pool = ThreadPool(max_workers)
+            pending.append(pool.apply_async(func, (item,)))
+            if len(pending) > window:
+                yield pending.popleft().get()
+
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        # calls still running are abandoned rather than waited on
+        if pool is not None:
+            pool.terminate()
+
+
+# Copyright 2013-2016 Allan Johns.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
@@ -156,14 +156,14 @@ class Wrapper(object):
         context = self.context
         if opts.patch is not None:
             new_request = opts.patch
-            request = context.get_patched_request(new_request, strict=opts.strict)
             config.remove_override("quiet")
             pkg_paths = (config.nonlocal_packages_path
                          if opts.no_local else None)
 
-            context = ResolvedContext(request,
-                                      package_paths=pkg_paths,
-                                      verbosity=opts.verbose)
+            context = context.patch(new_request,
+                                    strict=opts.strict,
+                                    package_paths=pkg_paths,
+                                    verbosity=opts.verbose)
 
             # reapply quiet mode (see cli.forward)
             if "REZ_QUIET" not in os.environ:
@@ -1,5 +1,5 @@
 from rezgui.qt import QtCore
-from rez.packages_ import iter_packages
+from rez.packages_ import iter_packages, prefetch_packages
 
 
 class LoadPackagesThread(QtCore.QObject):
@@ -29,7 +29,7 @@ class LoadPackagesThread(QtCore.QObject):
         num_packages = len(packages)
         self.progress.emit(0, num_packages)
 
-        for i, package in enumerate(packages):
+        for i, package in enumerate(prefetch_packages(packages)):
             if self.stopped:
                 return
             if self.callback and not self.callback(package):
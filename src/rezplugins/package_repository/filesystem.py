@@ -11,12 +11,15 @@ from rez.exceptions import PackageMetadataError, ResourceError, RezSystemError,
     ConfigurationError, PackageRepositoryError
 from rez.utils.formatting import is_valid_package_name, PackageRequest
 from rez.utils.resources import cached_property
+from rez.utils.logging_ import print_warning
 from rez.serialise import load_from_file, FileFormat
 from rez.config import config
 from rez.utils.memcached import memcached, pool_memcached_connections
 from rez.backport.lru_cache import lru_cache
 from rez.vendor.schema.schema import Schema, Optional, And, Use, Or
 from rez.vendor.version.version import Version, VersionRange
+import cPickle
+import tempfile
 import time
 import os.path
 import os
@@ -61,6 +64,12 @@ class FileSystemPackageFamilyResource(PackageFamilyResource):
             return 0
 
     def iter_packages(self):
+        index_entry = self._repository.get_index_family(self.name)
+        if index_entry is not None:
+            for package in self._iter_indexed_packages(index_entry):
+                yield package
+            return
+
         # check for unversioned package
         if config.allow_unversioned_packages:
             filepath, _ = self._repository._get_file(self.path)
@@ -87,6 +96,30 @@ class FileSystemPackageFamilyResource(PackageFamilyResource):
                 version=version_str)
             yield package
 
+    def _iter_indexed_packages(self, index_entry):
+        packages = index_entry["packages"]
+
+        if config.allow_unversioned_packages and None in packages:
+            package = self._repository.get_resource(
+                FileSystemPackageResource.key,
+                location=self.location,
+                name=self.name)
+            yield package
+            return
+
+        for version_str, (filename, _, _, _) in packages.iteritems():
+            if version_str is None:
+                continue
+            if _settings.check_package_definition_files and not filename:
+                continue
+
+            package = self._repository.get_resource(
+                FileSystemPackageResource.key,
+                location=self.location,
+                name=self.name,
+                version=version_str)
+            yield package
+
 
 class FileSystemPackageResource(PackageResourceHelper):
     key = "filesystem.package"
@@ -107,6 +140,8 @@ class FileSystemPackageResource(PackageResourceHelper):
 
     @cached_property
     def state_handle(self):
+        if self._index_entry:
+            return self._index_entry[2]
         if self.filepath:
             return os.path.getmtime(self.filepath)
         return None
@@ -133,9 +168,26 @@ class FileSystemPackageResource(PackageResourceHelper):
 
     @cached_property
     def _filepath_and_format(self):
+        if self._index_entry:
+            filename, ext, _, _ = self._index_entry
+            if not filename:
+                return None, None
+            return os.path.join(self.path, filename), FileFormat[ext]
+
         return self._repository._get_file(self.path)
 
+    @cached_property
+    def _index_entry(self):
+        # (filename, extension, state handle, data), or None if not indexed
+        entry = self._repository.get_index_family(self.name)
+        if entry is None:
+            return None
+        return entry["packages"].get(self.get("version"))
+
     def _load(self):
+        if self._index_entry and self._index_entry[3] is not None:
+            return self._index_entry[3]
+
         if self.filepath is None:
             raise PackageDefinitionFileMissing(
                 "Missing package definition file: %r" % self)
@@ -399,10 +451,33 @@ class FileSystemPackageRepository(PackageRepository):
             '1.1+':
                 requires:
                 - python-2.6
+
+    If the 'use_index' setting is enabled, an index of the repository is kept
+    in LOCATION/.rez-index/index. It records the package families, and for each
+    family its versions, package files, file modification times and loaded
+    package data, so that a package can be loaded without listing directories
+    or reading its package file. The index is updated whenever a variant is
+    installed, and can be rebuilt with `update_index`. A family's index entry
+    is only used if the family directory's modification time still matches,
+    and the index as a whole only if the repository directory's does;
+    otherwise the filesystem is read as usual. Note that package files edited
+    in place (as opposed to released) are not detected until the index is
+    rebuilt, which always reads the filesystem.
+
+    If the 'cache_family_names' setting is enabled, the repository directory
+    is listed once, and families that are not in the listing are known to be
+    missing without stat'ing the filesystem. The listing is memcached, keyed on
+    the repository directory's modification time.
     """
     schema_dict = {"file_lock_timeout": int,
                    "file_lock_dir": Or(None, str),
-                   "package_filenames": [basestring]}
+                   "package_filenames": [basestring],
+                   "use_index": bool,
+                   "cache_family_names": bool}
+
+    index_dirname = ".rez-index"
+    index_filename = "index"
+    index_format_version = 1
 
     @classmethod
     def name(cls):
@@ -432,6 +507,10 @@ class FileSystemPackageRepository(PackageRepository):
         self.get_packages = lru_cache(maxsize=None)(self._get_packages)
         self.get_variants = lru_cache(maxsize=None)(self._get_variants)
         self.get_file = lru_cache(maxsize=None)(self._get_file)
+        self.get_index = lru_cache(maxsize=None)(self._get_index)
+        self.get_index_family = lru_cache(maxsize=None)(self._get_index_family)
+        self.get_family_names = lru_cache(maxsize=None)(self._get_family_names)
+        self._building_index = False
 
     def _uid(self):
         t = ["filesystem", self.location]
@@ -518,6 +597,15 @@ class FileSystemPackageRepository(PackageRepository):
             if lock.is_locked():
                 lock.release()
 
+        # update the index after releasing the lock, since releasing it changes
+        # the repository directory's mtime, which would make the index stale
+        if _settings.use_index and not dry_run:
+            try:
+                self.update_index([variant_resource.name])
+            except Exception as e:
+                print_warning("Could not update the index of package "
+                              "repository %s: %s" % (self.location, e))
+
         return variant
 
     def clear_caches(self):
@@ -527,13 +615,173 @@ class FileSystemPackageRepository(PackageRepository):
         self.get_packages.cache_clear()
         self.get_variants.cache_clear()
         self.get_file.cache_clear()
+        self.get_index.cache_clear()
+        self.get_index_family.cache_clear()
+        self.get_family_names.cache_clear()
         self._get_family_dirs.forget()
+        self._list_family_names.forget()
         self._get_version_dirs.forget()
         # unfortunately we need to clear file cache across the board
         clear_file_caches()
 
+    def update_index(self, family_names=None):
+        """Update the repository index.
+
+        Every family in the repository is listed in the index, but only the
+        given families are read from the filesystem - other families keep
+        their existing index entry (if any).
+
+        Updates are made under a lock in the index directory, since each one
+        rewrites the whole index.
+
+        Args:
+            family_names (list of str): Families to index. If None, all
+                families are indexed.
+        """
+        from rez.vendor.lockfile import LockFile
+
+        # the index dir must exist before the repository mtime is read, since
+        # creating it changes that mtime. The lock is kept in the index dir for
+        # the same reason
+        index_path = os.path.join(self.location, self.index_dirname)
+        if not os.path.isdir(index_path):
+            os.makedirs(index_path)
+
+        lock = LockFile(os.path.join(index_path, ".lock"))
+        try:
+            lock.acquire(timeout=_settings.file_lock_timeout)
+
+            # read families from the filesystem, rather than from the index
+            # being replaced
+            self._building_index = True
+            self.clear_caches()
+            self._update_index(index_path, family_names)
+        finally:
+            self._building_index = False
+            self.clear_caches()
+            if lock.is_locked():
+                lock.release()
+
     # -- internal
 
+    def _update_index(self, index_path, family_names):
+        mtime = os.stat(self.location).st_mtime
+        family_dirs = self._get_family_dirs()
+        old_index = self._load_index() or {}
+        old_families = old_index.get("families", {})
+        families = {}
+
+        for name, ext in family_dirs:
+            if ext is not None:
+                continue  # combined families are not indexed
+            if family_names is None or name in family_names:
+                families[name] = self._index_family(name)
+            elif name in old_families:
+                families[name] = old_families[name]
+
+        # a family's directory is preferred to its combined package files, as
+        # in `_get_family`
+        preference = {None: 0, "py": 1, "yaml": 2}
+        family_exts = {}
+        for name, ext in family_dirs:
+            if name not in family_exts \
+                    or preference[ext] < preference[family_exts[name]]:
+                family_exts[name] = ext
+
+        index = dict(version=self.index_format_version,
+                     mtime=mtime,
+                     family_dirs=family_dirs,
+                     family_exts=family_exts,
+                     families=families)
+
+        data = cPickle.dumps(index, cPickle.HIGHEST_PROTOCOL)
+        fd, tmp_filepath = tempfile.mkstemp(dir=index_path, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+
+            filepath = os.path.join(index_path, self.index_filename)
+            if os.name == "nt" and os.path.exists(filepath):
+                os.remove(filepath)  # rename fails on Windows if dest exists
+            os.rename(tmp_filepath, filepath)
+        except:
+            if os.path.exists(tmp_filepath):
+                os.remove(tmp_filepath)
+            raise
+
+    def _load_index(self):
+        filepath = os.path.join(self.location, self.index_dirname,
+                                self.index_filename)
+        try:
+            with open(filepath, "rb") as f:
+                index = cPickle.load(f)
+        except Exception:
+            return None  # missing, or written by an incompatible rez
+
+        if not isinstance(index, dict) \
+                or index.get("version") != self.index_format_version:
+            return None
+        return index
+
+    def _get_index(self):
+        if not _settings.use_index or self._building_index:
+            return None
+
+        try:
+            mtime = os.stat(self.location).st_mtime
+        except OSError:
+            return None
+
+        index = self._load_index()
+        if index is None or index["mtime"] != mtime:
+            return None  # families have been added or removed since
+        return index
+
+    def _get_index_family(self, name):
+        index = self.get_index()
+        if index is None:
+            return None
+
+        entry = index["families"].get(name)
+        if entry is None:
+            return None
+
+        try:
+            mtime = os.path.getmtime(os.path.join(self.location, name))
+        except OSError:
+            return None
+
+        if mtime != entry["mtime"]:
+            return None  # packages have been released since
+        return entry
+
+    def _index_family(self, name):
+        path = os.path.join(self.location, name)
+        mtime = os.path.getmtime(path)
+        family = self.get_resource(
+            FileSystemPackageFamilyResource.key,
+            location=self.location,
+            name=name)
+
+        packages = {}
+        for package in family.iter_packages():
+            filepath = package.filepath
+            if filepath:
+                filename = os.path.basename(filepath)
+                ext = package.file_format.extension
+                state_handle = package.state_handle
+                try:
+                    data = package._data
+                except Exception:
+                    data = None  # the error is raised when read as normal
+            else:
+                filename = ext = state_handle = data = None
+
+            packages[package.get("version")] = (filename, ext, state_handle,
+                                                data)
+
+        return dict(mtime=mtime, packages=packages)
+
     def _get_family_dirs__key(self):
         if os.path.isdir(self.location):
             st = os.stat(self.location)
@@ -578,9 +826,39 @@ class FileSystemPackageRepository(PackageRepository):
                 dirs.append(name)
         return dirs
 
+    def _list_family_names__key(self):
+        st = os.stat(self.location)
+        return str(("family_names", self.location, st.st_ino, st.st_mtime))
+
+    @memcached(servers=config.memcached_uri if config.cache_listdir else None,
+               min_compress_len=config.memcached_listdir_min_compress_len,
+               key=_list_family_names__key,
+               debug=config.debug_memcache)
+    def _list_family_names(self):
+        # unlike _get_family_dirs, entries are not stat'd, so this may include
+        # names that are not families. It is only used to rule families out
+        names = set()
+        for name in os.listdir(self.location):
+            names.add(name)
+            name_, ext_ = os.path.splitext(name)
+            if ext_ in (".py", ".yaml"):
+                names.add(name_)
+        return names
+
+    def _get_family_names(self):
+        if not os.path.isdir(self.location):
+            return set()
+        return self._list_family_names()
+
     def _get_families(self):
+        index = self.get_index()
+        if index is None:
+            family_dirs = self._get_family_dirs()
+        else:
+            family_dirs = index["family_dirs"]
+
         families = []
-        for name, ext in self._get_family_dirs():
+        for name, ext in family_dirs:
             if ext is None:  # is a directory
                 family = self.get_resource(
                     FileSystemPackageFamilyResource.key,
@@ -597,6 +875,15 @@ class FileSystemPackageRepository(PackageRepository):
 
     def _get_family(self, name):
         is_valid_package_name(name, raise_error=True)
+
+        index = self.get_index()
+        if index is not None:
+            return self._get_indexed_family(index, name)
+
+        if _settings.cache_family_names \
+                and name not in self.get_family_names():
+            return None
+
         if os.path.isdir(os.path.join(self.location, name)):
             family = self.get_resource(
                 FileSystemPackageFamilyResource.key,
@@ -614,6 +901,24 @@ class FileSystemPackageRepository(PackageRepository):
                 return family
         return None
 
+    def _get_indexed_family(self, index, name):
+        family_exts = index["family_exts"]
+        if name not in family_exts:
+            return None
+
+        ext = family_exts[name]
+        if ext is None:
+            return self.get_resource(
+                FileSystemPackageFamilyResource.key,
+                location=self.location,
+                name=name)
+        else:
+            return self.get_resource(
+                FileSystemCombinedPackageFamilyResource.key,
+                location=self.location,
+                name=name,
+                ext=ext)
+
     def _get_packages(self, package_family_resource):
         return [x for x in package_family_resource.iter_packages()]
 